@@ -0,0 +1,162 @@
+import json
+import os
+import re
+
+from ledger import TransactionLedger, set_aside
+
+CONSOLIDATED = 'All Accounts'
+DEFAULT_ACCOUNT = 'Main'
+
+
+def _slug(name):
+    return re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_') or 'account'
+
+
+class AccountBook:
+    """Named accounts, each with its own transaction ledger.
+
+    Accounts only hold positions: prices and analyses live in the app's
+    shared per-symbol cache, so a symbol held in many accounts is fetched and
+    analyzed once. The consolidated view merges the accounts' positions, and
+    the combined ledger behind its value history (each account's shares
+    added up, never its transactions replayed together) is rebuilt only
+    after an account has changed.
+    """
+
+    def __init__(self, path='accounts.json', directory='accounts'):
+        self.path = path
+        self.directory = directory
+        # name -> ledger and name -> ledger file, in the order accounts were created
+        self.ledgers = {}
+        self.files = {}
+        self.current = DEFAULT_ACCOUNT
+        self.combined = None
+        # Accounts whose ledger file could not be read; the file was set aside and the account starts empty
+        self.failed = []
+
+    def names(self):
+        return list(self.ledgers)
+
+    def views(self):
+        return self.names() + [CONSOLIDATED]
+
+    def create(self, name):
+        name = name.strip()
+        if not name:
+            raise ValueError("Account name is empty")
+        if name in self.ledgers or name == CONSOLIDATED:
+            raise ValueError(f"Account {name} already exists")
+        taken = set(self.files.values())
+        base = _slug(name)
+        filename, n = f"{base}.json", 2
+        while filename in taken:
+            filename, n = f"{base}_{n}.json", n + 1
+        self.ledgers[name] = TransactionLedger()
+        self.files[name] = filename
+        self.save(name)
+        return self.ledgers[name]
+
+    def replace(self, name, ledger):
+        self.ledgers[name] = ledger
+        self.combined = None
+
+    def members(self, name):
+        """(account, ledger) pairs making up a view"""
+        if name == CONSOLIDATED:
+            return list(self.ledgers.items())
+        return [(name, self.ledgers[name])]
+
+    def ledger(self, name):
+        """The account's ledger, or for the consolidated view the accounts' ledgers added up"""
+        if name != CONSOLIDATED:
+            return self.ledgers[name]
+        if self.combined is None:
+            self.combined = TransactionLedger.combine(self.ledgers.values())
+        return self.combined
+
+    def positions(self, name, method='fifo'):
+        """Open positions in a view, each with the shares held per account.
+
+        Consolidated positions add up each account's own cost basis and
+        realized P&L, so lots are never matched across accounts.
+        """
+        merged = {}
+        for account, ledger in self.members(name):
+            for position in ledger.positions(method):
+                total = merged.get(position['symbol'])
+                if total is None:
+                    total = merged[position['symbol']] = {'symbol': position['symbol'], 'shares': 0.0,
+                                                          'cost_basis': 0.0, 'realized': 0.0,
+                                                          'dividends': 0.0, 'accounts': {}}
+                for field in ('shares', 'cost_basis', 'realized', 'dividends'):
+                    total[field] += position[field]
+                total['accounts'][account] = position['shares']
+        for total in merged.values():
+            total['avg_price'] = total['cost_basis'] / total['shares']
+        return list(merged.values())
+
+    def symbols(self):
+        """Every symbol with an open position in any account"""
+        return sorted({symbol for ledger in self.ledgers.values()
+                       for symbol, holding in ledger.holdings.items() if holding.shares > 0})
+
+    def realized_pnl(self, name, method='fifo'):
+        return sum(ledger.realized_pnl(method=method) for _, ledger in self.members(name))
+
+    def dividend_income(self, name):
+        return sum(ledger.dividend_income() for _, ledger in self.members(name))
+
+    def history_path(self, name):
+        if name == CONSOLIDATED:
+            return 'performance.npz'
+        return os.path.join(self.directory, self.files[name][:-len('.json')] + '.performance.npz')
+
+    def save(self, name=None):
+        """Save one account's ledger (or none, for the consolidated view) and the account index"""
+        os.makedirs(self.directory, exist_ok=True)
+        if name is not None and name != CONSOLIDATED:
+            self.ledgers[name].save(os.path.join(self.directory, self.files[name]))
+            self.combined = None
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'current': self.current, 'accounts': [[n, self.files[n]] for n in self.ledgers]}, f, indent=4)
+        os.replace(tmp_path, self.path)
+
+    def _load_ledger(self, name, path):
+        try:
+            return TransactionLedger.load(path)
+        except (OSError, ValueError) as e:
+            print(f"Error loading ledger for {name}: {e} (kept as {set_aside(path)})")
+            self.failed.append(name)
+            return TransactionLedger()
+
+    def load(self, legacy_ledger='ledger.json'):
+        """Load the account index and every account's ledger.
+
+        Files that cannot be read are renamed aside rather than loaded empty
+        and saved over. Without a readable index, every ledger file in the
+        directory is kept as an account named after its file.
+        """
+        self.failed = []
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    index = json.load(f)
+                accounts = [(name, filename) for name, filename in index['accounts']]
+                self.current = index.get('current', self.current)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"Error loading accounts: {e} (kept as {set_aside(self.path)})")
+                files = sorted(os.listdir(self.directory)) if os.path.isdir(self.directory) else []
+                accounts = [(filename[:-len('.json')], filename) for filename in files if filename.endswith('.json')]
+            for name, filename in accounts:
+                self.ledgers[name] = self._load_ledger(name, os.path.join(self.directory, filename))
+                self.files[name] = filename
+
+        if not self.ledgers:
+            # First run, or a single-ledger book from before accounts existed
+            self.ledgers[DEFAULT_ACCOUNT] = self._load_ledger(DEFAULT_ACCOUNT, legacy_ledger)
+            self.files[DEFAULT_ACCOUNT] = f"{_slug(DEFAULT_ACCOUNT)}.json"
+            self.save(DEFAULT_ACCOUNT)
+        if self.current not in self.ledgers and self.current != CONSOLIDATED:
+            self.current = next(iter(self.ledgers))
+        self.combined = None
@@ -0,0 +1,265 @@
+import bisect
+import json
+import os
+import queue
+import re
+import threading
+import urllib.request
+from datetime import datetime
+
+# kind -> (snapshot field, direction); direction is 'above', 'below' or 'change'
+RULE_KINDS = {
+    'price_above': ('price', 'above'),
+    'price_below': ('price', 'below'),
+    'rsi_above': ('rsi', 'above'),
+    'rsi_below': ('rsi', 'below'),
+    'gain_above': ('gain_pct', 'above'),
+    'gain_below': ('gain_pct', 'below'),
+    'recommendation_change': ('recommendation', 'change'),
+}
+
+# Price rules are crossings and need a previous quote; level rules also fire on the first one
+CROSSING_FIELDS = ('price',)
+
+RULE_PATTERN = re.compile(
+    r'^\s*([A-Za-z0-9.\-^=]+)\s+(price|rsi|gain|loss|rec|recommendation)\s*(>|<|change[sd]?)?\s*(-?[\d.]+)?\s*%?\s*$',
+    re.IGNORECASE)
+
+
+def parse_rule(text):
+    """Parse "AAPL price > 200", "TSLA rsi < 30", "MSFT loss > 5" or "NVDA rec change" """
+    match = RULE_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"Could not parse alert: {text}")
+    symbol, field, op, value = match.groups()
+    symbol = symbol.upper()
+    field = field.lower()
+    if field in ('rec', 'recommendation'):
+        return {'symbol': symbol, 'kind': 'recommendation_change', 'threshold': None}
+    if op not in ('>', '<') or value is None:
+        raise ValueError(f"Alert needs a comparison like '> 200': {text}")
+    threshold = float(value)
+    if field == 'loss':
+        # "loss > 5" means gain below -5%
+        return {'symbol': symbol, 'kind': 'gain_below' if op == '>' else 'gain_above', 'threshold': -threshold}
+    return {'symbol': symbol, 'kind': f"{field}_{'above' if op == '>' else 'below'}", 'threshold': threshold}
+
+
+def describe_rule(rule):
+    field, direction = RULE_KINDS[rule['kind']]
+    if direction == 'change':
+        return f"{rule['symbol']} recommendation changes"
+    label = {'price': 'price', 'rsi': 'RSI', 'gain_pct': 'gain %'}[field]
+    return f"{rule['symbol']} {label} {'>' if direction == 'above' else '<'} {rule['threshold']:g}"
+
+
+class Alert:
+    __slots__ = ('rule', 'symbol', 'value', 'time', 'message')
+
+    def __init__(self, rule, symbol, value, message):
+        self.rule = rule
+        self.symbol = symbol
+        self.value = value
+        self.time = datetime.now()
+        self.message = message
+
+    def to_dict(self):
+        return {'rule_id': self.rule['id'], 'symbol': self.symbol, 'kind': self.rule['kind'],
+                'threshold': self.rule['threshold'], 'value': self.value,
+                'time': self.time.isoformat(timespec='seconds'), 'message': self.message}
+
+
+class ThresholdIndex:
+    """Rules on one symbol and field, sorted by threshold.
+
+    Because "above"/"below" rules only fire on a transition, the rules that
+    fire for a move from old to new are exactly those whose threshold lies
+    between the two values, found with two bisects.
+    """
+    __slots__ = ('above', 'above_rules', 'below', 'below_rules')
+
+    def __init__(self):
+        self.above = []
+        self.above_rules = []
+        self.below = []
+        self.below_rules = []
+
+    def add(self, rule, direction):
+        thresholds, rules = (self.above, self.above_rules) if direction == 'above' else (self.below, self.below_rules)
+        i = bisect.bisect_right(thresholds, rule['threshold'])
+        thresholds.insert(i, rule['threshold'])
+        rules.insert(i, rule)
+
+    def remove(self, rule, direction):
+        rules = self.above_rules if direction == 'above' else self.below_rules
+        thresholds = self.above if direction == 'above' else self.below
+        i = rules.index(rule)
+        del rules[i]
+        del thresholds[i]
+
+    def __len__(self):
+        return len(self.above) + len(self.below)
+
+    def crossed(self, old, new):
+        if old is None:
+            # First observation: every rule already satisfied fires
+            return (self.above_rules[:bisect.bisect_left(self.above, new)] +
+                    self.below_rules[bisect.bisect_right(self.below, new):])
+        if new > old:
+            return self.above_rules[bisect.bisect_left(self.above, old):bisect.bisect_left(self.above, new)]
+        if new < old:
+            return self.below_rules[bisect.bisect_right(self.below, new):bisect.bisect_right(self.below, old)]
+        return []
+
+
+class AlertEngine:
+    """Evaluates alert rules against only the symbols whose data changed"""
+
+    def __init__(self, path='alerts.json'):
+        self.path = path
+        self.rules = {}
+        self.next_id = 1
+        # symbol -> {field: ThresholdIndex}, symbol -> [recommendation rules]
+        self.thresholds = {}
+        self.change_rules = {}
+        # symbol -> {field: last value seen}
+        self.last_values = {}
+        self.sinks = []
+        self.load()
+
+    def add_rule(self, symbol, kind, threshold=None, save=True):
+        if kind not in RULE_KINDS:
+            raise ValueError(f"Unknown alert type: {kind}")
+        rule = {'id': self.next_id, 'symbol': symbol.upper(), 'kind': kind,
+                'threshold': float(threshold) if threshold is not None else None}
+        self.next_id += 1
+        self._index(rule)
+        if save:
+            self.save()
+        return rule
+
+    def remove_rule(self, rule_id):
+        rule = self.rules.pop(rule_id, None)
+        if rule is None:
+            return
+        field, direction = RULE_KINDS[rule['kind']]
+        if direction == 'change':
+            self.change_rules[rule['symbol']].remove(rule)
+        else:
+            self.thresholds[rule['symbol']][field].remove(rule, direction)
+        self.save()
+
+    def _index(self, rule):
+        self.rules[rule['id']] = rule
+        field, direction = RULE_KINDS[rule['kind']]
+        if direction == 'change':
+            self.change_rules.setdefault(rule['symbol'], []).append(rule)
+        else:
+            fields = self.thresholds.setdefault(rule['symbol'], {})
+            fields.setdefault(field, ThresholdIndex()).add(rule, direction)
+
+    def update(self, symbol, snapshot):
+        """Evaluate the rules for one symbol against its new snapshot and dispatch any alerts"""
+        fields = self.thresholds.get(symbol)
+        change_rules = self.change_rules.get(symbol)
+        if fields is None and change_rules is None:
+            return []
+
+        last = self.last_values.setdefault(symbol, {})
+        fired = []
+        if fields:
+            for field, index in fields.items():
+                value = snapshot.get(field)
+                if value is None:
+                    continue
+                old = last.get(field)
+                if old is None and field in CROSSING_FIELDS:
+                    last[field] = value
+                    continue
+                for rule in index.crossed(old, value):
+                    fired.append(Alert(rule, symbol, value, f"🔔 {describe_rule(rule)} (now {value:,.2f})"))
+                last[field] = value
+
+        if change_rules:
+            recommendation = snapshot.get('recommendation')
+            old = last.get('recommendation')
+            if recommendation is not None and old is not None and recommendation != old:
+                for rule in change_rules:
+                    fired.append(Alert(rule, symbol, recommendation,
+                                       f"🔔 {symbol} recommendation changed: {old} → {recommendation}"))
+            if recommendation is not None:
+                last['recommendation'] = recommendation
+
+        if fired:
+            for sink in self.sinks:
+                sink.deliver(fired)
+        return fired
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(list(self.rules.values()), f, indent=4)
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                rules = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading alerts: {e}")
+            return
+        for rule in rules:
+            self._index(rule)
+            self.next_id = max(self.next_id, rule['id'] + 1)
+
+
+class AlertDispatcher:
+    """Hands alerts to a sink on a background thread so evaluation never waits on I/O"""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.queue = queue.Queue()
+        thread = threading.Thread(target=self._run)
+        thread.daemon = True
+        thread.start()
+
+    def deliver(self, alerts):
+        self.queue.put(alerts)
+
+    def _run(self):
+        while True:
+            alerts = self.queue.get()
+            try:
+                self.handler(alerts)
+            except Exception as e:
+                print(f"Error delivering alerts: {e}")
+
+
+class CallbackSink:
+    """Delivers alerts to a callable, e.g. one that schedules a GUI update"""
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def deliver(self, alerts):
+        self.callback(alerts)
+
+
+def log_sink(path='alerts.log'):
+    def write(alerts):
+        with open(path, 'a', encoding='utf-8') as f:
+            for alert in alerts:
+                f.write(f"{alert.time:%Y-%m-%d %H:%M:%S} {alert.message}\n")
+    return AlertDispatcher(write)
+
+
+def webhook_sink(url):
+    """POST alerts as JSON to url"""
+    def send(alerts):
+        payload = [alert.to_dict() for alert in alerts]
+        request = urllib.request.Request(url, data=json.dumps(payload).encode('utf-8'),
+                                         headers={'Content-Type': 'application/json'})
+        urllib.request.urlopen(request, timeout=10).close()
+    return AlertDispatcher(send)
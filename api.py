@@ -0,0 +1,202 @@
+import asyncio
+import hashlib
+import json
+import math
+import threading
+from datetime import datetime
+
+REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+# Events queued per SSE client before it counts as too slow and misses them
+SUBSCRIBER_BACKLOG = 256
+KEEPALIVE_SECONDS = 15
+
+
+def _finite(value):
+    """NaN and infinity have no JSON token; send them as null"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def _default(value):
+    # Compact analyses and numpy scalars from the analysis code
+    to_dict = getattr(value, 'to_dict', None)
+    if to_dict is not None:
+        return _finite(to_dict())
+    item = getattr(value, 'item', None)
+    if item is not None:
+        return _finite(item())
+    return str(value)
+
+
+def encode(payload):
+    return json.dumps(_finite(payload), default=_default, allow_nan=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+class ApiServer:
+    """Read-only HTTP/JSON view of the app, served from its own asyncio loop.
+
+    The app publishes each resource when its data changes; the payload is
+    serialized once there and every GET is answered from those cached bytes
+    with an ETag, so requests never touch app state or the Tk thread.
+    /events streams price and signal changes as server-sent events.
+    """
+
+    def __init__(self, port, host='127.0.0.1'):
+        self.host = host
+        self.port = port
+        # path -> (body bytes, etag)
+        self.responses = {}
+        # symbol -> {'price', 'recommendation', ...} behind /signals and the change events
+        self.signals = {}
+        self.signals_lock = threading.Lock()
+        self.subscribers = set()
+        self.loop = None
+        self.publish('/', {'endpoints': ['/positions', '/valuation', '/accounts', '/signals',
+                                         '/analysis/<SYMBOL>', '/events']})
+        self.publish('/signals', {})
+
+    def start(self):
+        ready = threading.Event()
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+            try:
+                self.loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+            except OSError as e:
+                print(f"API server could not listen on {self.host}:{self.port}: {e}")
+                ready.set()
+                return
+            ready.set()
+            self.loop.run_forever()
+
+        thread = threading.Thread(target=run)
+        thread.daemon = True
+        thread.start()
+        ready.wait()
+
+    def publish(self, path, payload):
+        """Replace the cached response for path (callable from any thread)"""
+        body = encode(payload)
+        etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+        self.responses[path] = (body, etag)
+
+    def publish_event(self, event, data):
+        chunk = f"event: {event}\ndata: ".encode('utf-8') + encode(data) + b"\n\n"
+        if self.loop is not None and self.subscribers:
+            self.loop.call_soon_threadsafe(self._broadcast, chunk)
+
+    def update_symbol(self, symbol, analysis):
+        """Publish a fresh analysis and emit events for a changed price or signal"""
+        signals = analysis.get('signals', {})
+        entry = {
+            'symbol': symbol,
+            'price': analysis.get('current_price'),
+            'recommendation': signals.get('recommendation'),
+            'score': signals.get('score'),
+            'rsi': analysis.get('rsi'),
+            'updated': datetime.now().isoformat(timespec='seconds'),
+        }
+        self.publish(f'/analysis/{symbol}', analysis)
+        with self.signals_lock:
+            old = self.signals.get(symbol, {})
+            self.signals[symbol] = entry
+            table = dict(self.signals)
+        self.publish('/signals', table)
+        if old.get('price') != entry['price']:
+            self.publish_event('price', {'symbol': symbol, 'price': entry['price'], 'previous': old.get('price')})
+        if old.get('recommendation') != entry['recommendation']:
+            self.publish_event('signal', {'symbol': symbol, 'recommendation': entry['recommendation'],
+                                          'previous': old.get('recommendation')})
+
+    def _broadcast(self, chunk):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(chunk)
+            except asyncio.QueueFull:
+                # A client this far behind only misses events; it never slows the others
+                pass
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                if len(parts) != 3:
+                    await self._respond(writer, 400, b'{"error":"bad request"}', close=True)
+                    break
+                method, target, version = parts
+                if method not in ('GET', 'HEAD'):
+                    # Read-only API; closing also skips any request body
+                    await self._respond(writer, 405, b'{"error":"read-only"}', close=True)
+                    break
+
+                path = target.split('?', 1)[0].rstrip('/') or '/'
+                if path == '/events':
+                    await self._stream(writer)
+                    break
+
+                keep_alive = (version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close')
+                cached = self.responses.get(path)
+                if cached is None and path.startswith('/analysis/'):
+                    cached = self.responses.get('/analysis/' + path[len('/analysis/'):].upper())
+                if cached is None:
+                    await self._respond(writer, 404, b'{"error":"not found"}', close=not keep_alive)
+                elif headers.get('if-none-match') == cached[1]:
+                    await self._respond(writer, 304, b'', cached[1], close=not keep_alive)
+                else:
+                    await self._respond(writer, 200, cached[0], cached[1], close=not keep_alive,
+                                        head=method == 'HEAD')
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, UnicodeDecodeError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, body, etag=None, close=False, head=False):
+        lines = [f"HTTP/1.1 {status} {REASONS[status]}",
+                 "Content-Type: application/json",
+                 f"Content-Length: {len(body) if status != 304 else 0}",
+                 "Cache-Control: no-cache"]
+        if etag:
+            lines.append(f"ETag: {etag}")
+        if close:
+            lines.append("Connection: close")
+        head_bytes = ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1')
+        writer.write(head_bytes if head or status == 304 else head_bytes + body)
+        await writer.drain()
+
+    async def _stream(self, writer):
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_BACKLOG)
+        self.subscribers.add(queue)
+        try:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                         b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n"
+                         b": connected\n\n")
+            await writer.drain()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    chunk = b": keep-alive\n\n"
+                writer.write(chunk)
+                await writer.drain()
+        finally:
+            self.subscribers.discard(queue)
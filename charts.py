@@ -0,0 +1,348 @@
+import threading
+import tkinter
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+
+UP_COLOR = "#00e676"
+DOWN_COLOR = "#ef5350"
+BG_COLOR = "#2b2b2b"
+AXES_COLOR = "#1a1a1a"
+
+
+def decimate_ohlc(opens, highs, lows, closes, max_bars):
+    """Collapse bars into at most max_bars buckets, keeping each bucket's extremes"""
+    n = len(closes)
+    x = np.arange(n, dtype=float)
+    if n <= max_bars:
+        return x, opens, highs, lows, closes
+    edges = np.linspace(0, n, max_bars + 1).astype(int)
+    starts = edges[:-1]
+    ends = edges[1:] - 1
+    return ((starts + ends) / 2.0,
+            opens[starts],
+            np.maximum.reduceat(highs, starts),
+            np.minimum.reduceat(lows, starts),
+            closes[ends])
+
+
+def decimate_minmax(x, y, width):
+    """Reduce a line to a min and a max point per pixel column, preserving spikes"""
+    n = len(y)
+    if n <= 2 * width:
+        return x, y
+    edges = np.linspace(0, n, width + 1).astype(int)[:-1]
+    # fmin/fmax skip NaN warm-up values (e.g. the first 49 bars of MA50); a bucket
+    # that is all warm-up stays NaN, which matplotlib leaves as a gap
+    lo = np.fmin.reduceat(y, edges)
+    hi = np.fmax.reduceat(y, edges)
+    centers = x[edges]
+    xs = np.repeat(centers, 2)
+    ys = np.empty(2 * len(edges))
+    ys[0::2] = lo
+    ys[1::2] = hi
+    return xs, ys
+
+
+def compute_indicators(closes):
+    """Indicator series matching the analysis in FinanceApp"""
+    series = pd.Series(closes)
+    ma_20 = series.rolling(20).mean()
+    std_20 = series.rolling(20).std()
+
+    deltas = series.diff()
+    avg_gain = deltas.clip(lower=0).rolling(14).mean()
+    avg_loss = (-deltas.clip(upper=0)).rolling(14).mean()
+    rsi = 100 - 100 / (1 + avg_gain / avg_loss.replace(0, np.nan))
+    rsi = rsi.fillna(100).where(avg_gain.notna())
+
+    macd = series.ewm(span=12, adjust=False).mean() - series.ewm(span=26, adjust=False).mean()
+    macd_signal = macd.ewm(span=9, adjust=False).mean()
+
+    return {
+        'ma_20': ma_20.to_numpy(),
+        'ma_50': series.rolling(50).mean().to_numpy(),
+        'bb_upper': (ma_20 + 2 * std_20).to_numpy(),
+        'bb_lower': (ma_20 - 2 * std_20).to_numpy(),
+        'rsi': rsi.to_numpy(),
+        'macd': macd.to_numpy(),
+        'macd_signal': macd_signal.to_numpy(),
+        'macd_hist': (macd - macd_signal).to_numpy(),
+    }
+
+
+class PriceChart:
+    """Candlestick chart with MA/Bollinger overlay and RSI and MACD panes.
+
+    The figure and its artists are built once and updated in place. Long
+    histories are decimated to the pixel width of the visible range, with
+    the decimation done off the UI thread. The last-price line is animated
+    and updated by blitting.
+    """
+
+    def __init__(self, scheduler, height=5.5):
+        self.scheduler = scheduler
+        self.canvas = None
+        self.background = None
+        self.generation = 0
+        self.data = None
+        self.dates = None
+
+        self.figure = Figure(figsize=(9, height), dpi=100, facecolor=BG_COLOR)
+        grid = self.figure.add_gridspec(3, 1, height_ratios=[3, 1, 1], hspace=0.05)
+        self.price_ax = self.figure.add_subplot(grid[0])
+        self.rsi_ax = self.figure.add_subplot(grid[1], sharex=self.price_ax)
+        self.macd_ax = self.figure.add_subplot(grid[2], sharex=self.price_ax)
+        self.figure.subplots_adjust(left=0.06, right=0.98, top=0.95, bottom=0.08)
+
+        for ax in (self.price_ax, self.rsi_ax, self.macd_ax):
+            ax.set_facecolor(AXES_COLOR)
+            ax.tick_params(colors="gray", labelsize=8)
+            ax.grid(color="#333333", linewidth=0.5)
+            for spine in ax.spines.values():
+                spine.set_color("#333333")
+        for ax in (self.price_ax, self.rsi_ax):
+            ax.tick_params(labelbottom=False)
+        self.macd_ax.xaxis.set_major_locator(MaxNLocator(8, integer=True))
+        self.macd_ax.xaxis.set_major_formatter(FuncFormatter(self._format_date))
+
+        self.wicks = LineCollection([], linewidths=1)
+        self.bodies = LineCollection([], linewidths=4)
+        self.price_ax.add_collection(self.wicks)
+        self.price_ax.add_collection(self.bodies)
+        self.ma_20_line, = self.price_ax.plot([], [], color="#ffa726", linewidth=1, label="MA 20")
+        self.ma_50_line, = self.price_ax.plot([], [], color="#ab47bc", linewidth=1, label="MA 50")
+        self.bb_upper_line, = self.price_ax.plot([], [], color="#64b5f6", linewidth=0.8, linestyle="--", label="Bollinger")
+        self.bb_lower_line, = self.price_ax.plot([], [], color="#64b5f6", linewidth=0.8, linestyle="--")
+        self.last_price_line = self.price_ax.axhline(0, color="#ffffff", linewidth=0.8,
+                                                     linestyle=":", animated=True, visible=False)
+        self.title = self.price_ax.set_title("", color="white", fontsize=11, loc="left")
+        legend = self.price_ax.legend(loc="upper left", fontsize=7, facecolor=AXES_COLOR, edgecolor="#333333")
+        for text in legend.get_texts():
+            text.set_color("gray")
+
+        self.rsi_line, = self.rsi_ax.plot([], [], color="#90caf9", linewidth=1)
+        self.rsi_ax.axhline(70, color=DOWN_COLOR, linewidth=0.6, linestyle="--")
+        self.rsi_ax.axhline(30, color=UP_COLOR, linewidth=0.6, linestyle="--")
+        self.rsi_ax.set_ylim(0, 100)
+        self.rsi_ax.set_ylabel("RSI", color="gray", fontsize=8)
+
+        self.macd_hist = LineCollection([], linewidths=2)
+        self.macd_ax.add_collection(self.macd_hist)
+        self.macd_line, = self.macd_ax.plot([], [], color="#90caf9", linewidth=1)
+        self.macd_signal_line, = self.macd_ax.plot([], [], color="#ffa726", linewidth=1)
+        self.macd_ax.set_ylabel("MACD", color="gray", fontsize=8)
+
+        self._drag_start = None
+
+    def widget(self):
+        """The Tk widget showing the chart, or None before the first attach"""
+        return self.canvas.get_tk_widget() if self.canvas is not None else None
+
+    def attach(self, master, host=None):
+        """Show the chart inside master, reusing the figure and its canvas.
+
+        The canvas widget is a child of host (master by default) and is
+        packed into master, which may be any widget inside host. While host
+        lives, redraws that rebuild master reuse the same canvas; a new one
+        is only created once the old widget has been destroyed.
+        """
+        host = host or master
+        widget = self.widget()
+        if widget is None or not widget.winfo_exists() or widget.master is not host:
+            self.canvas = FigureCanvasTkAgg(self.figure, master=host)
+            self.canvas.mpl_connect('draw_event', self._on_draw)
+            self.canvas.mpl_connect('scroll_event', self._on_scroll)
+            self.canvas.mpl_connect('button_press_event', self._on_press)
+            self.canvas.mpl_connect('motion_notify_event', self._on_motion)
+            self.canvas.mpl_connect('button_release_event', self._on_release)
+            widget = self.canvas.get_tk_widget()
+        widget.pack(in_=master, fill="both", expand=True, padx=10, pady=10)
+        # master was created after the canvas and would otherwise cover it
+        # (Canvas.lift raises canvas items, so go through Misc for the widget)
+        tkinter.Misc.tkraise(widget)
+        self.canvas.draw_idle()
+        return self.canvas
+
+    def load(self, symbol, hist):
+        """Compute indicators off the UI thread, then draw the full range"""
+        self.generation += 1
+        generation = self.generation
+        width = self._pixel_width()
+
+        def prepare():
+            closes = hist['Close'].to_numpy(dtype=float)
+            data = {
+                'open': hist['Open'].to_numpy(dtype=float),
+                'high': hist['High'].to_numpy(dtype=float),
+                'low': hist['Low'].to_numpy(dtype=float),
+                'close': closes,
+            }
+            data.update(compute_indicators(closes))
+            dates = hist.index
+            frame = self._decimate(data, 0, len(closes), width)
+            self.scheduler(lambda: self._apply_load(generation, symbol, data, dates, frame))
+
+        thread = threading.Thread(target=prepare)
+        thread.daemon = True
+        thread.start()
+
+    def update_last_price(self, price):
+        """Move the last-price marker without redrawing the figure"""
+        if self.canvas is None or self.data is None:
+            return
+        self.last_price_line.set_ydata([price, price])
+        self.last_price_line.set_visible(True)
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self.price_ax.draw_artist(self.last_price_line)
+        self.canvas.blit(self.price_ax.bbox)
+
+    def _pixel_width(self):
+        bbox = self.price_ax.get_window_extent()
+        return max(int(bbox.width), 100)
+
+    def _decimate(self, data, start, stop, width):
+        """Decimate the visible range plus one screen either side, so short pans need no rework"""
+        n = len(data['close'])
+        visible = max(stop - start, 1)
+        lo = max(int(start - visible), 0)
+        hi = min(int(stop + visible) + 1, n)
+        screens = (hi - lo) / visible
+        buckets = max(int(width // 2 * screens), 1)
+        sl = slice(lo, hi)
+        x, o, h, l, c = decimate_ohlc(data['open'][sl], data['high'][sl], data['low'][sl],
+                                      data['close'][sl], buckets)
+        full_x = np.arange(lo, hi, dtype=float)
+        frame = {'candles': (x + lo, o, h, l, c),
+                 'bar_px': width / min(visible, width // 2)}
+        points = max(int(width * screens), 1)
+        for key in ('ma_20', 'ma_50', 'bb_upper', 'bb_lower', 'rsi', 'macd', 'macd_signal', 'macd_hist'):
+            frame[key] = decimate_minmax(full_x, data[key][sl], points)
+        return frame
+
+    def _apply_load(self, generation, symbol, data, dates, frame):
+        if generation != self.generation:
+            return
+        self.data = data
+        self.dates = dates
+        self.title.set_text(symbol)
+        self.last_price_line.set_visible(False)
+        self._apply_frame(frame)
+        n = len(data['close'])
+        self.price_ax.set_xlim(-1, n)
+        self._autoscale_y(0, n)
+        if self.canvas is not None:
+            self.canvas.draw_idle()
+
+    def _apply_frame(self, frame):
+        x, o, h, l, c = frame['candles']
+        colors = np.where(c >= o, UP_COLOR, DOWN_COLOR)
+        self.wicks.set_segments(np.stack([np.column_stack([x, l]), np.column_stack([x, h])], axis=1))
+        self.wicks.set_color(colors)
+        self.bodies.set_segments(np.stack([np.column_stack([x, o]), np.column_stack([x, c])], axis=1))
+        self.bodies.set_color(colors)
+        self.bodies.set_linewidth(max(min(frame['bar_px'] * 0.6, 8), 1))
+
+        for line, key in ((self.ma_20_line, 'ma_20'), (self.ma_50_line, 'ma_50'),
+                          (self.bb_upper_line, 'bb_upper'), (self.bb_lower_line, 'bb_lower'),
+                          (self.rsi_line, 'rsi'), (self.macd_line, 'macd'),
+                          (self.macd_signal_line, 'macd_signal')):
+            line.set_data(*frame[key])
+
+        hx, hy = frame['macd_hist']
+        hy = np.nan_to_num(hy)
+        self.macd_hist.set_segments(np.stack([np.column_stack([hx, np.zeros_like(hy)]),
+                                              np.column_stack([hx, hy])], axis=1))
+        self.macd_hist.set_color(np.where(hy >= 0, UP_COLOR, DOWN_COLOR))
+
+    def _autoscale_y(self, start, stop):
+        start = max(int(start), 0)
+        stop = min(int(stop) + 1, len(self.data['close']))
+        if stop <= start:
+            return
+        low = np.nanmin(self.data['low'][start:stop])
+        high = np.nanmax(self.data['high'][start:stop])
+        pad = (high - low) * 0.05 or high * 0.01
+        self.price_ax.set_ylim(low - pad, high + pad)
+        macd = np.concatenate([self.data['macd'][start:stop], self.data['macd_signal'][start:stop],
+                               self.data['macd_hist'][start:stop]])
+        if np.isfinite(macd).any():
+            limit = np.nanmax(np.abs(macd)) * 1.1 or 1
+            self.macd_ax.set_ylim(-limit, limit)
+
+    def _format_date(self, value, pos=None):
+        if self.dates is None or not 0 <= int(value) < len(self.dates):
+            return ""
+        date = self.dates[int(value)]
+        start, stop = self.price_ax.get_xlim()
+        first = self.dates[min(max(int(start), 0), len(self.dates) - 1)]
+        last = self.dates[min(max(int(stop), 0), len(self.dates) - 1)]
+        if (last - first).days < 10:
+            return date.strftime("%m-%d %H:%M")
+        return date.strftime("%Y-%m-%d")
+
+    def _redecimate(self):
+        """Re-decimate the visible range in the background after a pan or zoom"""
+        if self.data is None:
+            return
+        start, stop = self.price_ax.get_xlim()
+        self.generation += 1
+        generation = self.generation
+        data = self.data
+        width = self._pixel_width()
+
+        def prepare():
+            frame = self._decimate(data, start, stop, width)
+            self.scheduler(lambda: self._apply_range(generation, frame, start, stop))
+
+        thread = threading.Thread(target=prepare)
+        thread.daemon = True
+        thread.start()
+
+    def _apply_range(self, generation, frame, start, stop):
+        if generation != self.generation:
+            return
+        self._apply_frame(frame)
+        self._autoscale_y(start, stop)
+        self.canvas.draw_idle()
+
+    def _on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.price_ax.bbox)
+        if self.last_price_line.get_visible():
+            self.price_ax.draw_artist(self.last_price_line)
+
+    def _on_scroll(self, event):
+        if self.data is None or event.xdata is None:
+            return
+        start, stop = self.price_ax.get_xlim()
+        scale = 0.8 if event.button == 'up' else 1.25
+        span = min(max((stop - start) * scale, 20), len(self.data['close']) + 2)
+        ratio = (event.xdata - start) / (stop - start)
+        start = event.xdata - span * ratio
+        self.price_ax.set_xlim(start, start + span)
+        self._redecimate()
+
+    def _on_press(self, event):
+        if event.button == 1 and event.xdata is not None:
+            self._drag_start = (event.x, self.price_ax.get_xlim())
+
+    def _on_motion(self, event):
+        if self._drag_start is None or self.data is None:
+            return
+        x0, (start, stop) = self._drag_start
+        shift = (x0 - event.x) * (stop - start) / self._pixel_width()
+        self.price_ax.set_xlim(start + shift, stop + shift)
+        self._autoscale_y(start + shift, stop + shift)
+        self.canvas.draw_idle()
+
+    def _on_release(self, event):
+        if self._drag_start is not None:
+            self._drag_start = None
+            self._redecimate()
@@ -0,0 +1,163 @@
+import json
+import os
+import threading
+
+# (lower bound, label), largest first
+MARKET_CAP_BUCKETS = [
+    (200e9, 'Mega'),
+    (10e9, 'Large'),
+    (2e9, 'Mid'),
+    (300e6, 'Small'),
+    (0, 'Micro'),
+]
+
+GROUPS = ('sector', 'industry', 'cap_bucket')
+
+
+def market_cap_bucket(market_cap):
+    if not market_cap:
+        return 'Unknown'
+    for bound, label in MARKET_CAP_BUCKETS:
+        if market_cap >= bound:
+            return label
+    return 'Unknown'
+
+
+def _number(value):
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+class FundamentalsTable:
+    """Cached per-symbol sector, industry, market cap, beta and P/E from ticker.info"""
+
+    def __init__(self, path='fundamentals.json'):
+        self.path = path
+        self.records = {}
+
+    def get(self, symbol):
+        return self.records.get(symbol)
+
+    def update_from_info(self, symbol, info):
+        market_cap = _number(info.get('marketCap'))
+        record = {
+            'sector': info.get('sector') or 'Unknown',
+            'industry': info.get('industry') or 'Unknown',
+            'market_cap': market_cap,
+            'cap_bucket': market_cap_bucket(market_cap),
+            'beta': _number(info.get('beta')),
+            'pe': _number(info.get('trailingPE')),
+        }
+        changed = self.records.get(symbol) != record
+        self.records[symbol] = record
+        return changed
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.records, f)
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    self.records = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error loading fundamentals: {e}")
+                self.records = {}
+
+
+class ExposureAggregator:
+    """Running portfolio exposures, updated by the delta of each position change.
+
+    Every group total (sector, industry, market-cap bucket) and the sums
+    behind weighted beta and P/E are adjusted when a position's value or its
+    symbol's fundamentals change, so reading the summary costs O(groups) no
+    matter how many positions are held. Positions are identified by an
+    arbitrary key so the same symbol can be held in several places.
+    """
+
+    def __init__(self, fundamentals):
+        self.fundamentals = fundamentals
+        self.lock = threading.Lock()
+        # key -> (symbol, value)
+        self.positions = {}
+        # symbol -> set of keys holding it
+        self.keys_by_symbol = {}
+        self.total = 0.0
+        self.groups = {group: {} for group in GROUPS}
+        self.beta_value = 0.0
+        self.beta_sum = 0.0
+        self.pe_value = 0.0
+        self.earnings_yield_sum = 0.0
+
+    def _apply(self, symbol, value, sign):
+        """Add (sign=1) or remove (sign=-1) one position's contribution"""
+        delta = value * sign
+        self.total += delta
+        record = self.fundamentals.get(symbol) or {}
+        for group in GROUPS:
+            totals = self.groups[group]
+            name = record.get(group, 'Unknown')
+            amount = totals.get(name, 0.0) + delta
+            if abs(amount) < 1e-9:
+                totals.pop(name, None)
+            else:
+                totals[name] = amount
+        beta = record.get('beta')
+        if beta is not None:
+            self.beta_value += delta
+            self.beta_sum += delta * beta
+        pe = record.get('pe')
+        if pe is not None and pe > 0:
+            self.pe_value += delta
+            self.earnings_yield_sum += delta / pe
+
+    def set_position(self, key, symbol, value):
+        value = float(value)
+        with self.lock:
+            old = self.positions.get(key)
+            if old == (symbol, value):
+                return
+            if old is not None:
+                self._apply(old[0], old[1], -1)
+                self.keys_by_symbol[old[0]].discard(key)
+            self.positions[key] = (symbol, value)
+            self.keys_by_symbol.setdefault(symbol, set()).add(key)
+            self._apply(symbol, value, 1)
+
+    def remove_position(self, key):
+        with self.lock:
+            old = self.positions.pop(key, None)
+            if old is not None:
+                self._apply(old[0], old[1], -1)
+                self.keys_by_symbol[old[0]].discard(key)
+
+    def sync(self, positions):
+        """Make the tracked positions match {key: (symbol, value)}, touching only what changed"""
+        for key in [key for key in self.positions if key not in positions]:
+            self.remove_position(key)
+        for key, (symbol, value) in positions.items():
+            self.set_position(key, symbol, value)
+
+    def update_fundamentals(self, symbol, info):
+        """Store fresh fundamentals and move the symbol's positions to their new groups"""
+        with self.lock:
+            value = sum(self.positions[key][1] for key in self.keys_by_symbol.get(symbol, ()))
+            if value:
+                self._apply(symbol, value, -1)
+            changed = self.fundamentals.update_from_info(symbol, info)
+            if value:
+                self._apply(symbol, value, 1)
+        return changed
+
+    def summary(self):
+        with self.lock:
+            total = self.total
+            weights = {group: sorted(((name, amount / total) for name, amount in totals.items()),
+                                     key=lambda item: -item[1]) if total > 0 else []
+                       for group, totals in self.groups.items()}
+            beta = self.beta_sum / self.beta_value if self.beta_value > 0 else None
+            # Portfolio P/E is the harmonic mean: value over aggregate earnings
+            pe = self.pe_value / self.earnings_yield_sum if self.earnings_yield_sum > 0 else None
+        return {'total': total, 'weights': weights, 'beta': beta, 'pe': pe}
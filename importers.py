@@ -0,0 +1,284 @@
+import csv
+import json
+import os
+import re
+from datetime import datetime
+
+# Header aliases used by common broker exports (Fidelity, Schwab, IBKR, Robinhood...)
+COLUMN_ALIASES = {
+    'symbol': ('symbol', 'ticker', 'instrument', 'security', 'stock'),
+    'shares': ('quantity', 'shares', 'qty', 'units', 'share count'),
+    'price': ('price', 'purchase price', 'cost per share', 'avg cost', 'average cost', 'trade price', 'unit price'),
+    'amount': ('amount', 'net amount', 'total', 'proceeds', 'value'),
+    'cost_basis': ('cost basis', 'cost basis total', 'total cost'),
+    'action': ('action', 'type', 'transaction type', 'activity', 'trans code', 'side'),
+    'date': ('date', 'trade date', 'run date', 'activity date', 'settlement date', 'date acquired'),
+}
+
+ACTION_ALIASES = {
+    'buy': ('buy', 'bought', 'purchase', 'you bought', 'reinvestment', 'buy to open'),
+    'sell': ('sell', 'sold', 'you sold', 'sale', 'sell to close'),
+    'dividend': ('dividend', 'div', 'cdiv', 'qualified dividend', 'dividend received', 'cash dividend'),
+    'split': ('split', 'stock split', 'spl'),
+}
+
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%Y/%m/%d', '%d-%b-%Y', '%Y%m%d')
+
+SYMBOL_PATTERN = re.compile(r'^[A-Z0-9][A-Z0-9.\-^=]{0,11}$')
+
+EXPORT_FIELDS = ('symbol', 'shares', 'purchase_price', 'current_price', 'market_value', 'gain_loss',
+                 'realized', 'dividends', 'recommendation', 'score', 'risk', 'rsi', 'macd',
+                 'ma_7', 'ma_20', 'ma_50', 'volatility', 'high_52w', 'low_52w')
+
+
+def parse_number(text):
+    if text is None:
+        return None
+    text = str(text).strip().replace('$', '').replace(',', '')
+    if not text or text in ('--', 'N/A'):
+        return None
+    negative = text.startswith('(') and text.endswith(')')
+    value = float(text.strip('()'))
+    return -value if negative else value
+
+
+def parse_date(text):
+    """ISO date for a broker date string, or None when it cannot be read"""
+    text = (text or '').strip().split(' ')[0]
+    # Fidelity/OFX style timestamps like 20240115120000[-5:EST]
+    if len(text) >= 8 and text[:8].isdigit():
+        text = text[:8]
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+
+def normalize_action(text):
+    text = (text or '').strip().lower()
+    for kind, aliases in ACTION_ALIASES.items():
+        if any(text == alias or text.startswith(alias + ' ') for alias in aliases):
+            return kind
+    return None
+
+
+def _map_columns(header):
+    lookup = {name.strip().lower(): name for name in header if name}
+    mapping = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in lookup:
+                mapping[field] = lookup[alias]
+                break
+    return mapping
+
+
+def read_broker_csv(path, chunk_size=10000, skipped=None):
+    """Stream (date, kind, symbol, shares, price) rows from a broker CSV in chunks.
+
+    Files without an action column are treated as a positions snapshot and
+    imported as buys at their cost basis, dated today unless the file has a
+    date column. Rows that cannot be parsed (including unreadable dates) are
+    skipped, and appended to the skipped list if one is given.
+    """
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        # Some brokers put a preamble above the real header
+        header = None
+        reader = csv.reader(f)
+        for row in reader:
+            mapping = _map_columns(row)
+            if 'symbol' in mapping and 'shares' in mapping:
+                header = row
+                break
+        if header is None:
+            raise ValueError("Could not find symbol and quantity columns")
+
+        index = {field: header.index(name) for field, name in mapping.items()}
+        chunk = []
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            txn = _parse_csv_row(row, index)
+            if txn:
+                chunk.append(txn)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            elif skipped is not None:
+                skipped.append(row)
+        if chunk:
+            yield chunk
+
+
+def _parse_csv_row(row, index):
+    def get(field):
+        i = index.get(field)
+        return row[i] if i is not None and i < len(row) else None
+
+    try:
+        symbol = (get('symbol') or '').strip().upper()
+        if not SYMBOL_PATTERN.match(symbol):
+            return None
+        kind = normalize_action(get('action')) if 'action' in index else 'buy'
+        if kind is None:
+            return None
+        shares = parse_number(get('shares')) or 0.0
+        price = parse_number(get('price'))
+        amount = parse_number(get('amount'))
+        date = parse_date(get('date')) if 'date' in index else datetime.now().strftime('%Y-%m-%d')
+        if date is None:
+            return None
+
+        if kind == 'dividend':
+            return (date, kind, symbol, 0.0, abs(amount if amount is not None else (price or 0.0) * shares))
+        if kind == 'split':
+            return (date, kind, symbol, abs(shares), 0.0) if shares else None
+
+        shares = abs(shares)
+        if not shares:
+            return None
+        if price is None:
+            total = parse_number(get('cost_basis')) if kind == 'buy' else None
+            total = total if total is not None else amount
+            if total is None:
+                return None
+            price = abs(total) / shares
+        return (date, kind, symbol, shares, abs(price))
+    except ValueError:
+        return None
+
+
+OFX_TRANSACTIONS = {'BUYSTOCK': 'buy', 'BUYMF': 'buy', 'BUYOTHER': 'buy', 'REINVEST': 'buy',
+                    'SELLSTOCK': 'sell', 'SELLMF': 'sell', 'SELLOTHER': 'sell',
+                    'INCOME': 'dividend', 'SPLIT': 'split'}
+OFX_TAG = re.compile(r'<(/?)([A-Z0-9.]+)>([^<\r\n]*)')
+
+
+def read_ofx(path, chunk_size=10000, skipped=None):
+    """Stream (date, kind, symbol, shares, price) rows from an OFX/QFX investment statement.
+
+    Securities are referenced by CUSIP in transactions and resolved through
+    the SECLIST, which brokers put after the transaction list, so rows are
+    buffered by CUSIP until the file has been read. Transactions that cannot
+    be read are appended to the skipped list if one is given.
+    """
+    pending = []
+    tickers = {}
+    current = None
+    kind = None
+    security = {}
+
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            for closing, tag, value in OFX_TAG.findall(line):
+                value = value.strip()
+                if tag in OFX_TRANSACTIONS:
+                    if closing and current is not None:
+                        pending.append((kind, current))
+                        current = None
+                    elif not closing:
+                        kind = OFX_TRANSACTIONS[tag]
+                        current = {}
+                elif tag in ('STOCKINFO', 'MFINFO', 'OTHERINFO', 'SECINFO'):
+                    if closing and security.get('UNIQUEID') and security.get('TICKER'):
+                        tickers[security['UNIQUEID']] = security['TICKER'].upper()
+                    if not closing and tag == 'SECINFO':
+                        security = {}
+                elif not closing and value:
+                    if current is not None:
+                        current[tag] = value
+                    else:
+                        security[tag] = value
+
+    chunk = []
+    for kind, fields in pending:
+        symbol = tickers.get(fields.get('UNIQUEID'), fields.get('UNIQUEID', ''))
+        try:
+            date = parse_date(fields.get('DTTRADE') or fields.get('DTPOSTED'))
+            if date is None:
+                raise ValueError("unreadable date")
+            if kind == 'dividend':
+                txn = (date, kind, symbol, 0.0, abs(parse_number(fields.get('TOTAL')) or 0.0))
+            elif kind == 'split':
+                numerator = parse_number(fields.get('NUMERATOR')) or 0.0
+                denominator = parse_number(fields.get('DENOMINATOR')) or 1.0
+                txn = (date, kind, symbol, numerator / denominator, 0.0)
+            else:
+                txn = (date, kind, symbol, abs(parse_number(fields.get('UNITS')) or 0.0),
+                       abs(parse_number(fields.get('UNITPRICE')) or 0.0))
+        except ValueError:
+            txn = None
+        if txn and SYMBOL_PATTERN.match(symbol) and (kind == 'dividend' or txn[3] > 0):
+            chunk.append(txn)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        elif skipped is not None:
+            skipped.append(fields)
+    if chunk:
+        yield chunk
+
+
+def read_transactions(path, chunk_size=10000, skipped=None):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.ofx', '.qfx'):
+        return read_ofx(path, chunk_size, skipped)
+    return read_broker_csv(path, chunk_size, skipped)
+
+
+def chronological(rows):
+    """Put a whole file's rows in date order.
+
+    Broker exports often list the newest transaction first, within each day
+    too, so a file that runs backwards is reversed as a whole. The ledger's
+    stable sort by date then keeps every day's rows in the order they happened.
+    """
+    if len(rows) > 1 and rows[0][0] > rows[-1][0]:
+        rows.reverse()
+    return rows
+
+
+def _export_row(stock):
+    analysis = stock.get('analysis') or {}
+    signals = analysis.get('signals') or {}
+    risk = analysis.get('risk_level') or {}
+    market_value = stock['shares'] * stock['current_price']
+    row = {
+        'symbol': stock['symbol'],
+        'shares': stock['shares'],
+        'purchase_price': stock['purchase_price'],
+        'current_price': stock['current_price'],
+        'market_value': market_value,
+        'gain_loss': market_value - stock['shares'] * stock['purchase_price'],
+        'realized': stock.get('realized', 0),
+        'dividends': stock.get('dividends', 0),
+        'recommendation': signals.get('recommendation', ''),
+        'score': signals.get('score', ''),
+        'risk': risk.get('level', ''),
+    }
+    for key in EXPORT_FIELDS:
+        if key not in row:
+            value = analysis.get(key)
+            row[key] = float(value) if value is not None else ''
+    return row
+
+
+def export_positions(path, positions):
+    """Write positions with their analyses one row at a time (.csv or .jsonl)"""
+    count = 0
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.jsonl'):
+            for stock in positions:
+                f.write(json.dumps(_export_row(stock)) + '\n')
+                count += 1
+        else:
+            writer = csv.DictWriter(f, fieldnames=EXPORT_FIELDS)
+            writer.writeheader()
+            for stock in positions:
+                writer.writerow(_export_row(stock))
+                count += 1
+    os.replace(tmp_path, path)
+    return count
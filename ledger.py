@@ -0,0 +1,394 @@
+import bisect
+import json
+import os
+from collections import deque
+from datetime import datetime
+
+TRANSACTION_TYPES = ('buy', 'sell', 'dividend', 'split')
+COST_METHODS = ('fifo', 'lifo', 'average')
+
+# Share counts below this are treated as a closed position
+EPSILON = 1e-9
+
+
+class Holding:
+    """Running state for one symbol, updated one transaction at a time"""
+    __slots__ = ('symbol', 'shares', 'fifo', 'lifo', 'fifo_cost', 'lifo_cost', 'avg_cost',
+                 'realized', 'dividends', 'last_date', 'transactions', 'index_dates', 'index_shares')
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.transactions = []
+        self.reset()
+
+    def reset(self):
+        self.shares = 0.0
+        self.fifo = deque()
+        self.lifo = []
+        self.fifo_cost = 0.0
+        self.lifo_cost = 0.0
+        self.avg_cost = 0.0
+        self.realized = {'fifo': 0.0, 'lifo': 0.0, 'average': 0.0}
+        self.dividends = 0.0
+        self.last_date = ''
+        # Point-in-time index: shares held after the last transaction on each date
+        self.index_dates = []
+        self.index_shares = []
+
+    def copy(self):
+        other = Holding(self.symbol)
+        other.transactions = list(self.transactions)
+        other.shares = self.shares
+        other.fifo = deque([lot[:] for lot in self.fifo])
+        other.lifo = [lot[:] for lot in self.lifo]
+        other.fifo_cost = self.fifo_cost
+        other.lifo_cost = self.lifo_cost
+        other.avg_cost = self.avg_cost
+        other.realized = dict(self.realized)
+        other.dividends = self.dividends
+        other.last_date = self.last_date
+        other.index_dates = list(self.index_dates)
+        other.index_shares = list(self.index_shares)
+        return other
+
+    @classmethod
+    def merge(cls, symbol, parts):
+        """One symbol's holdings in several ledgers added together.
+
+        The share index is the sum of each part's own index, so a split or a
+        sale only ever changes the shares of the ledger it was recorded in.
+        Lots stay with their parts; the merge carries the totals only.
+        """
+        merged = cls(symbol)
+        merged.transactions = sorted((txn for part in parts for txn in part.transactions), key=lambda t: t[0])
+        merged.index_dates = sorted({date for part in parts for date in part.index_dates})
+        merged.index_shares = [sum(part.shares_at(date) for part in parts) for date in merged.index_dates]
+        merged.shares = sum(part.shares for part in parts)
+        merged.fifo_cost = sum(part.fifo_cost for part in parts)
+        merged.lifo_cost = sum(part.lifo_cost for part in parts)
+        merged.avg_cost = sum(part.avg_cost for part in parts)
+        merged.realized = {method: sum(part.realized[method] for part in parts) for method in COST_METHODS}
+        merged.dividends = sum(part.dividends for part in parts)
+        merged.last_date = max(part.last_date for part in parts)
+        return merged
+
+    def apply(self, date, kind, shares, price):
+        # Every check comes before the first change, so a rejected transaction leaves no trace
+        if kind == 'buy':
+            self.fifo.append([shares, price])
+            self.lifo.append([shares, price])
+            cost = shares * price
+            self.fifo_cost += cost
+            self.lifo_cost += cost
+            self.avg_cost += cost
+            self.shares += shares
+        elif kind == 'sell':
+            if shares > self.shares + EPSILON:
+                raise ValueError(f"Cannot sell {shares} {self.symbol}, only {self.shares} held")
+            proceeds = shares * price
+            fifo_cost = self._consume(self.fifo, shares, self.fifo.popleft, 0)
+            lifo_cost = self._consume(self.lifo, shares, self.lifo.pop, -1)
+            avg_cost = self.avg_cost * shares / self.shares if self.shares else 0.0
+            self.fifo_cost -= fifo_cost
+            self.lifo_cost -= lifo_cost
+            self.avg_cost -= avg_cost
+            self.realized['fifo'] += proceeds - fifo_cost
+            self.realized['lifo'] += proceeds - lifo_cost
+            self.realized['average'] += proceeds - avg_cost
+            self.shares -= shares
+            if self.shares < EPSILON:
+                self.shares = 0.0
+                self.fifo.clear()
+                self.lifo.clear()
+                self.fifo_cost = self.lifo_cost = self.avg_cost = 0.0
+        elif kind == 'dividend':
+            self.dividends += price
+        elif kind == 'split':
+            if shares <= 0:
+                raise ValueError(f"Invalid split ratio {shares} for {self.symbol}")
+            for lot in self.fifo:
+                lot[0] *= shares
+                lot[1] /= shares
+            for lot in self.lifo:
+                lot[0] *= shares
+                lot[1] /= shares
+            self.shares *= shares
+        else:
+            raise ValueError(f"Unknown transaction type: {kind}")
+
+        if self.index_dates and self.index_dates[-1] == date:
+            self.index_shares[-1] = self.shares
+        else:
+            self.index_dates.append(date)
+            self.index_shares.append(self.shares)
+        self.last_date = date
+
+    @staticmethod
+    def _consume(lots, shares, pop, end):
+        """Remove shares from the lot queue and return their cost"""
+        cost = 0.0
+        remaining = shares
+        while remaining > EPSILON and lots:
+            lot = lots[end]
+            if lot[0] <= remaining + EPSILON:
+                cost += lot[0] * lot[1]
+                remaining -= lot[0]
+                pop()
+            else:
+                cost += remaining * lot[1]
+                lot[0] -= remaining
+                remaining = 0.0
+        return cost
+
+    def cost_basis(self, method='fifo'):
+        if method == 'fifo':
+            return self.fifo_cost
+        if method == 'lifo':
+            return self.lifo_cost
+        if method == 'average':
+            return self.avg_cost
+        raise ValueError(f"Unknown cost method: {method}")
+
+    def shares_at(self, date):
+        i = bisect.bisect_right(self.index_dates, date)
+        return self.index_shares[i - 1] if i else 0.0
+
+
+class TransactionLedger:
+    """Append-only ledger of buy, sell, dividend and split events.
+
+    Positions, cost basis (FIFO, LIFO and average) and realized P&L are
+    maintained incrementally as transactions are recorded, so nothing is
+    replayed on read. Dates are ISO "YYYY-MM-DD" strings. On disk the
+    ledger is one JSON row per line, and a save appends only the rows
+    recorded since the last one.
+    """
+
+    def __init__(self):
+        self.transactions = []
+        self.holdings = {}
+        # File the first saved_count transactions are known to be in; None forces a full rewrite
+        self.saved_path = None
+        self.saved_count = None
+
+    def __len__(self):
+        return len(self.transactions)
+
+    def record(self, kind, symbol, shares, price, date=None):
+        kind = kind.lower()
+        if kind not in TRANSACTION_TYPES:
+            raise ValueError(f"Unknown transaction type: {kind}")
+        if date is None:
+            date = datetime.now().strftime("%Y-%m-%d")
+        txn = (date, kind, symbol, float(shares), float(price))
+
+        holding = self.holdings.get(symbol) or Holding(symbol)
+        if date >= holding.last_date:
+            holding.apply(date, kind, txn[3], txn[4])
+            holding.transactions.append(txn)
+        else:
+            # Back-dated entry: only this symbol needs to be rebuilt
+            history = list(holding.transactions)
+            dates = [t[0] for t in history]
+            history.insert(bisect.bisect_right(dates, date), txn)
+            holding = self._rebuild(symbol, history)
+
+        self.holdings[symbol] = holding
+        self.transactions.append(txn)
+        return txn
+
+    def buy(self, symbol, shares, price, date=None):
+        return self.record('buy', symbol, shares, price, date)
+
+    def sell(self, symbol, shares, price, date=None):
+        return self.record('sell', symbol, shares, price, date)
+
+    def dividend(self, symbol, amount, date=None):
+        return self.record('dividend', symbol, 0, amount, date)
+
+    def split(self, symbol, ratio, date=None):
+        return self.record('split', symbol, ratio, 0, date)
+
+    def extend(self, rows):
+        """Bulk-append (date, kind, symbol, shares, price) rows, all or none of them.
+
+        Rows are applied to copies of the holdings they touch, which replace
+        the originals only once every row has gone in.
+        """
+        rows = sorted(((str(r[0]), r[1].lower(), r[2], float(r[3]), float(r[4])) for r in rows),
+                      key=lambda r: r[0])
+        staged = {}
+        backdated = set()
+        for txn in rows:
+            date, kind, symbol, shares, price = txn
+            if kind not in TRANSACTION_TYPES:
+                raise ValueError(f"Unknown transaction type: {kind}")
+            holding = staged.get(symbol)
+            if holding is None:
+                current = self.holdings.get(symbol)
+                holding = staged[symbol] = current.copy() if current is not None else Holding(symbol)
+            if symbol in backdated or date < holding.last_date:
+                backdated.add(symbol)
+            else:
+                holding.apply(date, kind, shares, price)
+            holding.transactions.append(txn)
+        for symbol in backdated:
+            staged[symbol] = self._rebuild(symbol, sorted(staged[symbol].transactions, key=lambda t: t[0]))
+        self.holdings.update(staged)
+        self.transactions.extend(rows)
+        return len(rows)
+
+    def remove(self, symbol):
+        """Drop every transaction for a symbol, e.g. one entered by mistake"""
+        if self.holdings.pop(symbol, None) is None:
+            return 0
+        before = len(self.transactions)
+        self.transactions = [txn for txn in self.transactions if txn[2] != symbol]
+        self.saved_count = None
+        return before - len(self.transactions)
+
+    def _rebuild(self, symbol, history):
+        """Replay a symbol's history into a new holding; raises without touching the ledger"""
+        holding = Holding(symbol)
+        for date, kind, _, shares, price in history:
+            holding.apply(date, kind, shares, price)
+        holding.transactions = history
+        return holding
+
+    @classmethod
+    def combine(cls, ledgers):
+        """A read-only ledger adding up several ledgers, holding by holding (see Holding.merge)"""
+        combined = cls()
+        parts = {}
+        for ledger in ledgers:
+            combined.transactions.extend(ledger.transactions)
+            for symbol, holding in ledger.holdings.items():
+                parts.setdefault(symbol, []).append(holding)
+        combined.transactions.sort(key=lambda t: t[0])
+        for symbol, holdings in parts.items():
+            combined.holdings[symbol] = Holding.merge(symbol, holdings)
+        return combined
+
+    def position(self, symbol):
+        return self.holdings.get(symbol)
+
+    def positions(self, method='fifo'):
+        """Open positions as dicts, in the order symbols were first traded"""
+        result = []
+        for symbol, holding in self.holdings.items():
+            if holding.shares <= 0:
+                continue
+            cost = holding.cost_basis(method)
+            result.append({
+                'symbol': symbol,
+                'shares': holding.shares,
+                'cost_basis': cost,
+                'avg_price': cost / holding.shares,
+                'realized': holding.realized[method],
+                'dividends': holding.dividends
+            })
+        return result
+
+    def holdings_at(self, date):
+        """Shares held per symbol at the end of the given date"""
+        result = {}
+        for symbol, holding in self.holdings.items():
+            shares = holding.shares_at(date)
+            if shares > 0:
+                result[symbol] = shares
+        return result
+
+    def cost_basis(self, symbol, method='fifo'):
+        holding = self.holdings.get(symbol)
+        return holding.cost_basis(method) if holding else 0.0
+
+    def realized_pnl(self, symbol=None, method='fifo'):
+        if symbol is not None:
+            holding = self.holdings.get(symbol)
+            return holding.realized[method] if holding else 0.0
+        return sum(h.realized[method] for h in self.holdings.values())
+
+    def dividend_income(self, symbol=None):
+        if symbol is not None:
+            holding = self.holdings.get(symbol)
+            return holding.dividends if holding else 0.0
+        return sum(h.dividends for h in self.holdings.values())
+
+    def unrealized_pnl(self, prices, method='fifo'):
+        """Unrealized P&L per symbol given a {symbol: price} mapping"""
+        result = {}
+        for symbol, holding in self.holdings.items():
+            if holding.shares > 0 and symbol in prices:
+                result[symbol] = holding.shares * prices[symbol] - holding.cost_basis(method)
+        return result
+
+    def save(self, path):
+        """Append the rows recorded since the last save; rewrite the file only when it has to change"""
+        if path == self.saved_path and self.saved_count is not None and os.path.exists(path):
+            if self.saved_count < len(self.transactions):
+                try:
+                    with open(path, 'a') as f:
+                        f.write(''.join(_line(txn) for txn in self.transactions[self.saved_count:]))
+                except OSError:
+                    # The file may now end in a partial row; the next save rewrites it
+                    self.saved_count = None
+                    raise
+                self.saved_count = len(self.transactions)
+            return
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            for txn in self.transactions:
+                f.write(_line(txn))
+        os.replace(tmp_path, path)
+        self.saved_path, self.saved_count = path, len(self.transactions)
+
+    @classmethod
+    def load(cls, path):
+        """Load a saved ledger; a missing file is an empty ledger, an unreadable one raises"""
+        ledger = cls()
+        if not os.path.exists(path):
+            return ledger
+        with open(path, 'r') as f:
+            if f.read(2) in ('', '["'):
+                f.seek(0)
+                rows, complete = _read_lines(f)
+            else:
+                # One JSON array, as ledgers were saved before rows were appended
+                f.seek(0)
+                rows, complete = json.loads(f.read()), False
+        try:
+            ledger.extend(rows)
+        except (TypeError, IndexError, AttributeError) as e:
+            raise ValueError(f"{path} is not a transaction ledger: {e}") from e
+        if complete:
+            ledger.saved_path, ledger.saved_count = path, len(ledger.transactions)
+        return ledger
+
+
+def _line(txn):
+    return json.dumps(txn, separators=(',', ':')) + '\n'
+
+
+def _read_lines(f):
+    """Rows from a JSON-lines ledger, and whether the file can be appended to as it is"""
+    rows = []
+    complete = True
+    for line in f:
+        if not line.endswith('\n'):
+            # Cut off mid-append: keep the row if it is whole, and rewrite the file on the next save
+            complete = False
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                pass
+            break
+        if line.strip():
+            rows.append(json.loads(line))
+    return rows, complete
+
+
+def set_aside(path):
+    """Rename a file that failed to load so nothing is ever saved over it"""
+    aside = f"{path}.{datetime.now().strftime('%Y%m%d-%H%M%S')}.bad"
+    os.replace(path, aside)
+    return aside
@@ -1,5 +1,4 @@
 import customtkinter as ctk
-import yfinance as yf
 import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
@@ -9,15 +8,38 @@ from datetime import datetime, timedelta
 import json
 import os
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from PIL import Image
 import requests
 from bs4 import BeautifulSoup
+from tkinter import filedialog
+from ledger import TransactionLedger, COST_METHODS
+from accounts import AccountBook, CONSOLIDATED
+from importers import chronological, read_transactions, export_positions
+from charts import PriceChart
+from market_data import MarketData, TIMEFRAMES, POLL_INTERVALS, market_session
+from providers import provider_from_env
+from exposure import FundamentalsTable, ExposureAggregator
+from performance import PortfolioHistory, flows_on
+from api import ApiServer
+from signals import SIGNAL_CODES, RISK_CODES, describe_signals, describe_risk
+from snapshot import CompactAnalysis, save_snapshot, load_snapshot
+from alerts import AlertEngine, CallbackSink, log_sink, webhook_sink, parse_rule, describe_rule
 
 # Set appearance
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
+# Chart ranges: (yfinance period, bar interval)
+CHART_RANGES = {
+    "5D": ("5d", "1m"),
+    "1M": ("1mo", "5m"),
+    "1Y": ("1y", "1d"),
+    "5Y": ("5y", "1d"),
+    "MAX": ("max", "1d")
+}
+
 class FinanceApp(ctk.CTk):
     def __init__(self):
         super().__init__()
@@ -27,21 +49,248 @@ class FinanceApp(ctk.CTk):
         self.geometry("1600x900")
         
         # Data
+        # Yahoo by default; PORTFOLIO_PROVIDER=record/playback captures or replays a session offline
+        self.market_data = MarketData(provider_from_env())
+        # Rows for the account (or consolidated view) on screen, built from its ledger
+        # positions and the symbol cache shared by every account
+        self.accounts = AccountBook('accounts.json', 'accounts')
+        self.current_account = self.accounts.current
+        self.symbol_cache = {}
         self.portfolio = []
         self.watchlist = []
-        self.load_data()
+        self.ledger = TransactionLedger()
+        self.cost_method = "fifo"
+        self.fundamentals = FundamentalsTable('fundamentals.json')
+        self.exposure = ExposureAggregator(self.fundamentals)
+        # Daily value snapshots per view and the performance figures computed from them
+        self.histories = {}
+        self.history = PortfolioHistory('performance.npz')
+        self.performance = None
+        self.data_loaded = False
+        # Symbols whose analysis was fetched this session; the rest show the saved snapshot
+        self.fresh_symbols = set()
+        
+        # Charts are created once and re-attached to whichever view shows them
+        self.research_chart = PriceChart(self.schedule)
+        self.position_chart = PriceChart(self.schedule, height=4.5)
+        self.position_chart_symbol = None
+        self.research_generation = 0
+        
+        # Watchlist quotes: latest values per symbol and the rows showing them
+        self.watchlist_quotes = {}
+        self.watchlist_rows = {}
+        self.watchlist_items = {}
+        self.watchlist_poll_running = False
+        self.after(1000, self.poll_watchlist)
+        
+        # Alerts go to the GUI, alerts.log and, when PORTFOLIO_WEBHOOK_URL is set, a webhook
+        self.recent_alerts = []
+        self.alert_engine = AlertEngine('alerts.json')
+        self.alert_engine.sinks = [
+            CallbackSink(lambda alerts: self.schedule(lambda: self.show_alerts(alerts))),
+            log_sink('alerts.log')
+        ]
+        if os.environ.get('PORTFOLIO_WEBHOOK_URL'):
+            self.alert_engine.sinks.append(webhook_sink(os.environ['PORTFOLIO_WEBHOOK_URL']))
+        
+        # Read-only JSON API on localhost, off unless PORTFOLIO_API_PORT is set
+        self.api = None
+        if os.environ.get('PORTFOLIO_API_PORT'):
+            self.api = ApiServer(int(os.environ['PORTFOLIO_API_PORT']))
+            self.api.start()
+        
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
         
         # Show welcome screen
         self.current_view = "welcome"
         self.show_welcome_screen()
         
+        # Load the book and warm the caches while the welcome screen is up
+        self.start_warmup()
+        
+    def start_warmup(self):
+        def warmup():
+            self.load_data()
+            self.data_loaded = True
+            self.schedule(self.on_data_loaded)
+            self.prefetch()
+        
+        thread = threading.Thread(target=warmup)
+        thread.daemon = True
+        thread.start()
+    
+    def on_close(self):
+        """Finish the market data recording, if one is running, before the window goes"""
+        close = getattr(self.market_data.provider, 'close', None)
+        if close is not None:
+            close()
+        self.destroy()
+    
+    def on_data_loaded(self):
+        if self.current_view == "portfolio":
+            self.update_watchlist_display()
+            self.update_portfolio_display()
+            self.refresh_watchlist_quotes()
+    
+    def prefetch(self):
+        """Fetch fresh data for holdings first, then the watchlist, then company info"""
+        # Every account's holdings, so switching accounts later needs no fetch
+        holdings = self.accounts.symbols()
+        watched = [symbol for symbol in self.watchlist if symbol not in holdings]
+        
+        try:
+            analyses = self.get_batch_analysis(holdings)
+            if analyses:
+                self.apply_analyses(analyses)
+                self.save_data()
+                self.schedule(self.redraw_portfolio)
+            self.update_history()
+            
+            if watched:
+                quotes = self.compute_quotes(self.market_data.refresh_tail(watched))
+                self.schedule(lambda: self.apply_quotes(quotes))
+        except Exception as e:
+            print(f"Error during prefetch: {e}")
+        
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            for symbol in holdings:
+                pool.submit(self.load_fundamentals, symbol)
+            for symbol in watched:
+                pool.submit(self.market_data.get_info, symbol)
+        
+        self.fundamentals.save()
+        self.publish_api()
+        self.schedule(self.update_exposure_display)
+    
+    def load_fundamentals(self, symbol):
+        """Fetch company info and fold its sector, size, beta and P/E into the exposures"""
+        try:
+            self.exposure.update_fundamentals(symbol, self.market_data.get_info(symbol))
+        except Exception as e:
+            print(f"Error loading fundamentals for {symbol}: {e}")
+    
+    def update_exposure(self):
+        """Push current position values to the exposure aggregates; unchanged rows cost nothing"""
+        self.exposure.sync({(account, stock['symbol']): (stock['symbol'], shares * stock['current_price'])
+                            for stock in self.portfolio for account, shares in stock['accounts'].items()})
+    
+    def update_history(self):
+        """Record today's portfolio snapshot in the background and refresh the performance figures"""
+        account, history, ledger, rows = self.current_account, self.history, self.ledger, self.portfolio
+        
+        def record():
+            try:
+                now = datetime.now()
+                today = now.strftime("%Y-%m-%d")
+                if history.needs_backfill(ledger, today):
+                    # Past transactions changed: rebuild from the ledger and cached daily closes
+                    bars = self.market_data.get_cached_bars(list(ledger.holdings))
+                    history.backfill(ledger, {symbol: hist['Close'] for symbol, hist in bars.items()})
+                if now.weekday() < 5 and rows:
+                    history.record(today,
+                                   {stock['symbol']: stock['shares'] * stock['current_price'] for stock in rows},
+                                   flows_on(ledger, today), ledger)
+                history.save()
+                metrics = history.metrics()
+                if account == self.current_account:
+                    self.performance = metrics
+                    self.publish_api()
+                    self.schedule(self.update_performance_display)
+            except Exception as e:
+                print(f"Error updating performance history: {e}")
+        
+        thread = threading.Thread(target=record)
+        thread.daemon = True
+        thread.start()
+    
+    def apply_analyses(self, analyses):
+        """Store fresh analyses in the shared symbol cache and on the rows showing them"""
+        compact = {symbol: CompactAnalysis.from_analysis(analysis) for symbol, analysis in analyses.items()}
+        self.symbol_cache.update(compact)
+        self.fresh_symbols.update(compact)
+        for stock in self.portfolio:
+            analysis = compact.get(stock['symbol'])
+            if analysis is not None:
+                stock['current_price'] = analysis['current_price']
+                stock['analysis'] = analysis
+        for symbol, analysis in analyses.items():
+            self.evaluate_alerts(symbol, analysis)
+            if self.api is not None:
+                self.api.update_symbol(symbol, compact[symbol])
+        self.update_exposure()
+        self.publish_api()
+    
+    def publish_api(self):
+        """Hand the API fresh positions and valuation for the current view"""
+        if self.api is None:
+            return
+        
+        positions = []
+        total_value = total_cost = 0.0
+        for stock in self.portfolio:
+            value = stock['shares'] * stock['current_price']
+            cost = stock['shares'] * stock['purchase_price']
+            total_value += value
+            total_cost += cost
+            positions.append({
+                'symbol': stock['symbol'],
+                'shares': stock['shares'],
+                'avg_cost': stock['purchase_price'],
+                'price': stock['current_price'],
+                'market_value': value,
+                'gain_loss': value - cost,
+                'gain_pct': (value / cost - 1) * 100 if cost > 0 else 0.0,
+                'accounts': stock['accounts'],
+                'recommendation': (stock.get('analysis') or {}).get('signals', {}).get('recommendation')
+            })
+        
+        performance = self.performance and {key: value for key, value in self.performance.items()
+                                            if key != 'rolling_sharpe'}
+        self.api.publish('/positions', {'account': self.current_account, 'positions': positions})
+        self.api.publish('/valuation', {
+            'account': self.current_account,
+            'cost_method': self.cost_method,
+            'total_value': total_value,
+            'total_cost': total_cost,
+            'unrealized': total_value - total_cost,
+            'realized': self.accounts.realized_pnl(self.current_account, self.cost_method),
+            'dividends': self.accounts.dividend_income(self.current_account),
+            'exposure': self.exposure.summary(),
+            'performance': performance
+        })
+        self.api.publish('/accounts', {'current': self.current_account, 'accounts': self.accounts.views()})
+    
+    def redraw_portfolio(self):
+        if self.current_view == "portfolio" and self.portfolio_scroll.winfo_exists():
+            self.update_portfolio_display()
+    
     def load_data(self):
-        if os.path.exists('portfolio.json'):
+        legacy_rows = []
+        if os.path.exists('analysis_snapshot.bin'):
+            try:
+                self.symbol_cache = load_snapshot('analysis_snapshot.bin')
+            except (OSError, ValueError) as e:
+                print(f"Error loading analysis snapshot: {e}")
+                self.symbol_cache = {}
+        elif os.path.exists('symbol_cache.json'):
+            # Caches saved as JSON before the compact snapshot format
+            try:
+                with open('symbol_cache.json', 'r') as f:
+                    cached = json.load(f)
+                self.symbol_cache = {symbol: CompactAnalysis.from_analysis(entry['analysis'])
+                                     for symbol, entry in cached.items() if entry.get('analysis')}
+            except:
+                self.symbol_cache = {}
+        elif os.path.exists('portfolio.json'):
+            # Books saved before accounts kept prices and analyses on the portfolio rows
             try:
                 with open('portfolio.json', 'r') as f:
-                    self.portfolio = json.load(f)
+                    legacy_rows = json.load(f)
+                for stock in legacy_rows:
+                    if stock.get('analysis'):
+                        self.symbol_cache[stock['symbol']] = CompactAnalysis.from_analysis(stock['analysis'])
             except:
-                self.portfolio = []
+                legacy_rows = []
         
         if os.path.exists('watchlist.json'):
             try:
@@ -49,12 +298,77 @@ class FinanceApp(ctk.CTk):
                     self.watchlist = json.load(f)
             except:
                 self.watchlist = []
+        
+        if os.path.exists('watchlist_quotes.json'):
+            try:
+                with open('watchlist_quotes.json', 'r') as f:
+                    self.watchlist_quotes = json.load(f)
+                for quote in self.watchlist_quotes.values():
+                    quote['stale'] = True
+            except:
+                self.watchlist_quotes = {}
+        
+        if self.api is not None:
+            for symbol, analysis in self.symbol_cache.items():
+                self.api.update_symbol(symbol, analysis)
+        
+        self.fundamentals.load()
+        self.accounts.load('ledger.json')
+        self.current_account = self.accounts.current
+        main_ledger = next(iter(self.accounts.ledgers.values()))
+        if len(self.accounts.ledgers) == 1 and not len(main_ledger) and legacy_rows and not self.accounts.failed:
+            # Seed the ledger from portfolios saved before it existed (never over one that failed to load)
+            for stock in legacy_rows:
+                main_ledger.buy(stock['symbol'], stock['shares'], stock['purchase_price'],
+                                stock.get('date_added'))
+            self.accounts.save(self.accounts.names()[0])
+        self.select_account(self.current_account)
+    
+    def schedule(self, callback):
+        """Run callback on the Tk thread"""
+        self.after(0, callback)
     
     def save_data(self):
-        with open('portfolio.json', 'w') as f:
-            json.dump(self.portfolio, f, indent=4)
-        with open('watchlist.json', 'w') as f:
+        # Nothing is saved until load_data has finished, or a half-loaded book would overwrite the files
+        if not self.data_loaded:
+            return
+        # Write everything to temp files first so a failed save never leaves a half-written book
+        with open('watchlist.json.tmp', 'w') as f:
             json.dump(self.watchlist, f, indent=4)
+        save_snapshot('analysis_snapshot.bin', dict(self.symbol_cache))
+        self.accounts.save(self.current_account)
+        os.replace('watchlist.json.tmp', 'watchlist.json')
+    
+    def select_account(self, name):
+        """Point the view at an account (or the consolidated view); everything it needs is already in memory"""
+        self.current_account = self.accounts.current = name
+        self.ledger = self.accounts.ledger(name)
+        history = self.histories.get(name)
+        if history is None:
+            history = self.histories[name] = PortfolioHistory(self.accounts.history_path(name))
+            history.load()
+        self.history = history
+        self.performance = None
+        self.sync_portfolio()
+    
+    def sync_portfolio(self):
+        """Rebuild the rows for the current view from its positions and the shared symbol cache"""
+        rows = []
+        for position in self.accounts.positions(self.current_account, self.cost_method):
+            analysis = self.symbol_cache.get(position['symbol'])
+            rows.append({
+                'symbol': position['symbol'],
+                'shares': position['shares'],
+                'purchase_price': position['avg_price'],
+                'realized': position['realized'],
+                'dividends': position['dividends'],
+                'accounts': position['accounts'],
+                'current_price': analysis['current_price'] if analysis is not None else position['avg_price'],
+                'analysis': analysis
+            })
+        self.portfolio = rows
+        self.update_exposure()
+        self.publish_api()
     
     def show_welcome_screen(self):
         # Clear window
@@ -203,172 +517,179 @@ class FinanceApp(ctk.CTk):
         
         return upper, sma, lower
     
-    def get_advanced_analysis(self, symbol):
+    def get_advanced_analysis(self, symbol, timeframe="1d"):
         """Get comprehensive advanced stock analysis"""
         try:
-            ticker = yf.Ticker(symbol)
-            
             # Get historical data
-            hist = ticker.history(period="3mo")
-            if hist.empty:
-                return None
-            
-            current_price = hist['Close'].iloc[-1]
-            prices = hist['Close'].tolist()
-            
-            # Technical indicators
-            rsi = self.calculate_rsi(prices)
-            macd, macd_signal, macd_hist = self.calculate_macd(prices)
-            bb_upper, bb_middle, bb_lower = self.calculate_bollinger_bands(prices)
-            
-            # Moving averages
-            ma_7 = sum(prices[-7:]) / 7 if len(prices) >= 7 else current_price
-            ma_20 = sum(prices[-20:]) / 20 if len(prices) >= 20 else current_price
-            ma_50 = sum(prices[-50:]) / 50 if len(prices) >= 50 else current_price
-            
-            # Price momentum
-            week_change = ((prices[-1] - prices[-7]) / prices[-7] * 100) if len(prices) >= 7 else 0
-            month_change = ((prices[-1] - prices[-30]) / prices[-30] * 100) if len(prices) >= 30 else 0
-            
-            # Volume analysis
-            avg_volume = hist['Volume'].mean()
-            current_volume = hist['Volume'].iloc[-1]
-            volume_ratio = current_volume / avg_volume if avg_volume > 0 else 1
-            
-            # Volatility
-            volatility = pd.Series(prices).pct_change().std() * 100
-            
-            # Support and resistance
-            high_52w = max(prices[-252:]) if len(prices) >= 252 else max(prices)
-            low_52w = min(prices[-252:]) if len(prices) >= 252 else min(prices)
-            
-            # Generate advanced signals
-            signals = self.generate_advanced_signals(
-                rsi, macd, macd_signal, current_price, bb_upper, bb_lower,
-                ma_7, ma_20, ma_50, week_change, month_change, volume_ratio, volatility
-            )
-            
-            # Risk assessment
-            risk_level = self.assess_risk(volatility, rsi, current_price, bb_upper, bb_lower)
-            
-            return {
-                'current_price': current_price,
-                'rsi': rsi,
-                'macd': macd,
-                'macd_signal': macd_signal,
-                'macd_hist': macd_hist,
-                'bb_upper': bb_upper,
-                'bb_middle': bb_middle,
-                'bb_lower': bb_lower,
-                'ma_7': ma_7,
-                'ma_20': ma_20,
-                'ma_50': ma_50,
-                'week_change': week_change,
-                'month_change': month_change,
-                'volume_ratio': volume_ratio,
-                'volatility': volatility,
-                'high_52w': high_52w,
-                'low_52w': low_52w,
-                'signals': signals,
-                'risk_level': risk_level
-            }
+            hist = self.market_data.get_bars(symbol, timeframe)
+            return self.analyze_history(hist, timeframe)
         except Exception as e:
             print(f"Error analyzing {symbol}: {e}")
             return None
     
+    def get_multi_timeframe_analysis(self, symbol, timeframes=("5m", "1h", "1d", "1wk")):
+        """Analyze several timeframes from one shared load per source interval"""
+        results = {}
+        try:
+            bars = self.market_data.get_many(symbol, timeframes)
+        except Exception as e:
+            print(f"Error loading {symbol} history: {e}")
+            return results
+        for timeframe, hist in bars.items():
+            analysis = self.analyze_history(hist, timeframe)
+            if analysis:
+                results[timeframe] = analysis
+        return results
+    
+    def get_batch_analysis(self, symbols, timeframe="1d"):
+        """Analyze many symbols from a single batched history download"""
+        symbols = sorted(set(symbols))
+        if not symbols:
+            return {}
+        
+        try:
+            bars = self.market_data.download(symbols, timeframe)
+        except Exception as e:
+            print(f"Error downloading {len(symbols)} symbols: {e}")
+            return {}
+        return self.analyze_bars(bars, timeframe)
+    
+    def analyze_bars(self, bars, timeframe="1d"):
+        """Analyze {symbol: history} from a download; symbols that fail are left out"""
+        results = {}
+        for symbol, hist in bars.items():
+            try:
+                analysis = self.analyze_history(hist, timeframe)
+                if analysis:
+                    results[symbol] = analysis
+            except Exception as e:
+                print(f"Error analyzing {symbol}: {e}")
+        return results
+    
+    def analyze_history(self, hist, timeframe="1d"):
+        """Run the full analysis over an OHLCV history in the given timeframe"""
+        if hist.empty:
+            return None
+        
+        current_price = hist['Close'].iloc[-1]
+        prices = hist['Close'].tolist()
+        
+        # Technical indicators
+        rsi = self.calculate_rsi(prices)
+        macd, macd_signal, macd_hist = self.calculate_macd(prices)
+        bb_upper, bb_middle, bb_lower = self.calculate_bollinger_bands(prices)
+        
+        # Moving averages
+        ma_7 = sum(prices[-7:]) / 7 if len(prices) >= 7 else current_price
+        ma_20 = sum(prices[-20:]) / 20 if len(prices) >= 20 else current_price
+        ma_50 = sum(prices[-50:]) / 50 if len(prices) >= 50 else current_price
+        
+        config = TIMEFRAMES[timeframe]
+        
+        # Price momentum over a week and a month of the timeframe's bars
+        week_bars, month_bars = config['week_bars'], config['month_bars']
+        week_change = ((prices[-1] - prices[-week_bars - 1]) / prices[-week_bars - 1] * 100) if len(prices) > week_bars else 0
+        month_change = ((prices[-1] - prices[-month_bars - 1]) / prices[-month_bars - 1] * 100) if len(prices) > month_bars else 0
+        
+        # Volume analysis
+        stats_bars = config['stats_bars']
+        avg_volume = hist['Volume'].iloc[-stats_bars:].mean()
+        current_volume = hist['Volume'].iloc[-1]
+        volume_ratio = current_volume / avg_volume if avg_volume > 0 else 1
+        
+        # Volatility
+        volatility = pd.Series(prices[-stats_bars:]).pct_change().std() * 100
+        
+        # Support and resistance over the timeframe's range window (52 weeks on daily bars)
+        range_bars = config['range_bars']
+        high_52w = max(prices[-range_bars:])
+        low_52w = min(prices[-range_bars:])
+        
+        # Generate advanced signals
+        signals = self.generate_advanced_signals(
+            rsi, macd, macd_signal, current_price, bb_upper, bb_lower,
+            ma_7, ma_20, ma_50, week_change, month_change, volume_ratio, volatility
+        )
+        
+        # Risk assessment
+        risk_level = self.assess_risk(volatility, rsi, current_price, bb_upper, bb_lower)
+        
+        return {
+            'current_price': current_price,
+            'rsi': rsi,
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'macd_hist': macd_hist,
+            'bb_upper': bb_upper,
+            'bb_middle': bb_middle,
+            'bb_lower': bb_lower,
+            'ma_7': ma_7,
+            'ma_20': ma_20,
+            'ma_50': ma_50,
+            'week_change': week_change,
+            'month_change': month_change,
+            'volume_ratio': volume_ratio,
+            'volatility': volatility,
+            'high_52w': high_52w,
+            'low_52w': low_52w,
+            'signals': signals,
+            'risk_level': risk_level,
+            'timeframe': timeframe
+        }
+    
     def generate_advanced_signals(self, rsi, macd, macd_signal, price, bb_upper, bb_lower, 
                                    ma_7, ma_20, ma_50, week_change, month_change, volume_ratio, volatility):
         """Generate advanced trading signals with detailed analysis"""
-        signals = []
-        score = 0
+        codes = []
         
         # RSI Analysis
         if rsi < 30:
-            signals.append(("🟢 OVERSOLD", "RSI below 30 indicates oversold conditions - potential buying opportunity", 2))
-            score += 2
+            codes.append(SIGNAL_CODES['oversold'])
         elif rsi > 70:
-            signals.append(("🔴 OVERBOUGHT", "RSI above 70 indicates overbought conditions - consider taking profits", -2))
-            score -= 2
+            codes.append(SIGNAL_CODES['overbought'])
         elif 45 <= rsi <= 55:
-            signals.append(("🟡 NEUTRAL RSI", "RSI in neutral zone - no strong momentum signal", 0))
+            codes.append(SIGNAL_CODES['neutral_rsi'])
         
         # MACD Analysis
         if macd and macd_signal:
             if macd > macd_signal and macd > 0:
-                signals.append(("🟢 MACD BULLISH", "MACD above signal line with positive momentum", 2))
-                score += 2
+                codes.append(SIGNAL_CODES['macd_bullish'])
             elif macd < macd_signal and macd < 0:
-                signals.append(("🔴 MACD BEARISH", "MACD below signal line with negative momentum", -2))
-                score -= 2
+                codes.append(SIGNAL_CODES['macd_bearish'])
         
         # Bollinger Bands
         if bb_upper and bb_lower:
             if price < bb_lower:
-                signals.append(("🟢 BELOW BB LOWER", "Price touching lower Bollinger Band - potential reversal up", 1))
-                score += 1
+                codes.append(SIGNAL_CODES['below_bb'])
             elif price > bb_upper:
-                signals.append(("🔴 ABOVE BB UPPER", "Price touching upper Bollinger Band - potential reversal down", -1))
-                score -= 1
+                codes.append(SIGNAL_CODES['above_bb'])
         
         # Moving Average Trends
         if ma_7 > ma_20 > ma_50:
-            signals.append(("🟢 STRONG UPTREND", "All moving averages aligned bullishly - strong upward trend", 2))
-            score += 2
+            codes.append(SIGNAL_CODES['strong_uptrend'])
         elif ma_7 < ma_20 < ma_50:
-            signals.append(("🔴 STRONG DOWNTREND", "All moving averages aligned bearishly - strong downward trend", -2))
-            score -= 2
+            codes.append(SIGNAL_CODES['strong_downtrend'])
         elif ma_7 > ma_20:
-            signals.append(("🟢 SHORT-TERM UPTREND", "7-day MA above 20-day MA - short-term bullish", 1))
-            score += 1
+            codes.append(SIGNAL_CODES['short_uptrend'])
         
         # Momentum Analysis
         if month_change > 10:
-            signals.append(("🟢 STRONG MOMENTUM", f"Up {month_change:.1f}% this month - strong buying pressure", 1))
-            score += 1
+            codes.append(SIGNAL_CODES['strong_momentum'])
         elif month_change < -10:
-            signals.append(("🔴 WEAK MOMENTUM", f"Down {month_change:.1f}% this month - strong selling pressure", -1))
-            score -= 1
+            codes.append(SIGNAL_CODES['weak_momentum'])
         
         # Volume Analysis
         if volume_ratio > 2:
-            signals.append(("📈 HIGH VOLUME SPIKE", "Volume 2x above average - significant institutional interest", 1))
-            score += 1
+            codes.append(SIGNAL_CODES['volume_spike'])
         elif volume_ratio < 0.5:
-            signals.append(("📉 LOW VOLUME", "Below average volume - lack of conviction", 0))
+            codes.append(SIGNAL_CODES['low_volume'])
         
         # Volatility
         if volatility > 3:
-            signals.append(("⚠️ HIGH VOLATILITY", f"Volatility at {volatility:.1f}% - expect large price swings", 0))
-        
-        # Overall recommendation
-        if score >= 4:
-            recommendation = "🚀 STRONG BUY"
-            action = "Excellent entry point with multiple bullish signals"
-            color = "#00e676"
-        elif score >= 2:
-            recommendation = "✅ BUY"
-            action = "Good opportunity with positive indicators"
-            color = "#66bb6a"
-        elif score >= -1:
-            recommendation = "⏸️ HOLD"
-            action = "Wait for clearer signals before making moves"
-            color = "#ffa726"
-        elif score >= -3:
-            recommendation = "⚠️ CONSIDER SELLING"
-            action = "Warning signs present - protect your capital"
-            color = "#ff7043"
-        else:
-            recommendation = "🚨 STRONG SELL"
-            action = "Multiple bearish signals - exit recommended"
-            color = "#ef5350"
+            codes.append(SIGNAL_CODES['high_volatility'])
         
-        return {
-            'recommendation': recommendation,
-            'action': action,
-            'color': color,
-            'signals': signals,
-            'score': score
-        }
+        # Overall recommendation and display text come from the signal tables
+        return describe_signals(codes, month_change, volatility)
     
     def assess_risk(self, volatility, rsi, price, bb_upper, bb_lower):
         """Assess investment risk level"""
@@ -388,11 +709,11 @@ class FinanceApp(ctk.CTk):
                 risk_score += 1
         
         if risk_score >= 5:
-            return {"level": "HIGH", "color": "#ef5350", "desc": "High volatility - suitable for risk-tolerant traders"}
+            return describe_risk(RISK_CODES["HIGH"])
         elif risk_score >= 3:
-            return {"level": "MEDIUM", "color": "#ffa726", "desc": "Moderate risk - balanced approach recommended"}
+            return describe_risk(RISK_CODES["MEDIUM"])
         else:
-            return {"level": "LOW", "color": "#66bb6a", "desc": "Relatively stable - suitable for conservative investors"}
+            return describe_risk(RISK_CODES["LOW"])
     
     def get_market_news(self):
         """Get general market news from multiple sources"""
@@ -400,8 +721,7 @@ class FinanceApp(ctk.CTk):
         
         # Try to get news from yfinance as backup
         try:
-            sp500 = yf.Ticker("^GSPC")
-            yf_news = sp500.news
+            yf_news = self.market_data.get_news("^GSPC")
             for article in yf_news[:5]:
                 news_items.append({
                     'title': article.get('title', 'No title'),
@@ -470,6 +790,21 @@ class FinanceApp(ctk.CTk):
                                              font=ctk.CTkFont(size=18))
         self.portfolio_summary.pack(side="right", padx=20)
         
+        # Account selector
+        ctk.CTkButton(header, text="➕", width=35, command=self.new_account,
+                     fg_color="transparent", hover_color="gray30").pack(side="right", padx=(0, 10))
+        
+        self.account_menu = ctk.CTkOptionMenu(header, values=self.accounts.views(),
+                                              command=self.switch_account, width=160)
+        self.account_menu.set(self.current_account)
+        self.account_menu.pack(side="right", padx=5)
+        
+        # Cost basis method
+        self.cost_method_menu = ctk.CTkOptionMenu(header, values=[m.upper() for m in COST_METHODS],
+                                                  command=self.change_cost_method, width=110)
+        self.cost_method_menu.set(self.cost_method.upper())
+        self.cost_method_menu.pack(side="right", padx=10)
+        
         # Main content with two sections
         main = ctk.CTkFrame(content, fg_color="transparent")
         main.pack(fill="both", expand=True, padx=10, pady=10)
@@ -483,7 +818,11 @@ class FinanceApp(ctk.CTk):
         add_frame = ctk.CTkFrame(left_panel, corner_radius=10)
         add_frame.pack(fill="x", padx=10, pady=10)
         
-        ctk.CTkLabel(add_frame, text="Add Stock", font=ctk.CTkFont(size=18, weight="bold")).pack(pady=10)
+        ctk.CTkLabel(add_frame, text="Add Transaction", font=ctk.CTkFont(size=18, weight="bold")).pack(pady=10)
+        
+        self.txn_type_menu = ctk.CTkOptionMenu(add_frame, values=["Buy", "Sell", "Dividend", "Split"],
+                                               command=self.change_transaction_type, height=35)
+        self.txn_type_menu.pack(pady=5, padx=10, fill="x")
         
         self.symbol_entry = ctk.CTkEntry(add_frame, placeholder_text="Symbol (e.g., AAPL)", height=35)
         self.symbol_entry.pack(pady=5, padx=10, fill="x")
@@ -494,7 +833,7 @@ class FinanceApp(ctk.CTk):
         self.price_entry = ctk.CTkEntry(add_frame, placeholder_text="Purchase Price", height=35)
         self.price_entry.pack(pady=5, padx=10, fill="x")
         
-        ctk.CTkButton(add_frame, text="Add to Portfolio", command=self.add_stock,
+        ctk.CTkButton(add_frame, text="Record Transaction", command=self.add_stock,
                      height=40, font=ctk.CTkFont(size=14, weight="bold")).pack(pady=10, padx=10, fill="x")
         
         self.status_label = ctk.CTkLabel(add_frame, text="", font=ctk.CTkFont(size=11), wraplength=300)
@@ -509,6 +848,33 @@ class FinanceApp(ctk.CTk):
         ctk.CTkButton(btn_frame, text="🗑️ Clear", command=self.clear_portfolio,
                      width=100, fg_color="#d32f2f").pack(side="left", padx=5)
         
+        io_frame = ctk.CTkFrame(add_frame, fg_color="transparent")
+        io_frame.pack(pady=(0, 10))
+        
+        ctk.CTkButton(io_frame, text="📥 Import", command=self.import_portfolio,
+                     width=100, fg_color="gray30").pack(side="left", padx=5)
+        ctk.CTkButton(io_frame, text="📤 Export", command=self.export_portfolio,
+                     width=100, fg_color="gray30").pack(side="left", padx=5)
+        
+        # Alerts section
+        alert_frame = ctk.CTkFrame(left_panel, corner_radius=10)
+        alert_frame.pack(fill="x", padx=10, pady=(0, 10))
+        
+        ctk.CTkLabel(alert_frame, text="🔔 Alerts", font=ctk.CTkFont(size=18, weight="bold")).pack(pady=(10, 5))
+        
+        alert_entry_frame = ctk.CTkFrame(alert_frame, fg_color="transparent")
+        alert_entry_frame.pack(fill="x", padx=10)
+        
+        self.alert_entry = ctk.CTkEntry(alert_entry_frame, placeholder_text="AAPL price > 200", height=30)
+        self.alert_entry.pack(side="left", fill="x", expand=True)
+        ctk.CTkButton(alert_entry_frame, text="Add", width=50, height=30,
+                     command=self.add_alert).pack(side="left", padx=(5, 0))
+        
+        self.alerts_display = ctk.CTkScrollableFrame(alert_frame, height=80)
+        self.alerts_display.pack(fill="x", padx=10, pady=10)
+        
+        self.update_alerts_display()
+        
         # Watchlist section
         watch_frame = ctk.CTkFrame(left_panel, corner_radius=10)
         watch_frame.pack(fill="both", expand=True, padx=10, pady=10)
@@ -519,11 +885,24 @@ class FinanceApp(ctk.CTk):
         self.watchlist_display.pack(fill="both", expand=True, padx=10, pady=10)
         
         self.update_watchlist_display()
+        self.refresh_watchlist_quotes()
         
         # Right: Portfolio & advanced analysis
         right_panel = ctk.CTkFrame(main)
         right_panel.pack(side="right", fill="both", expand=True)
         
+        # Exposure summary
+        exposure_frame = ctk.CTkFrame(right_panel, fg_color="#1a1a1a", corner_radius=8)
+        exposure_frame.pack(fill="x", padx=10, pady=(10, 0))
+        
+        self.exposure_label = ctk.CTkLabel(exposure_frame, text="", font=ctk.CTkFont(size=12),
+                                           justify="left", anchor="w", wraplength=900)
+        self.exposure_label.pack(fill="x", padx=15, pady=(8, 0))
+        
+        self.performance_label = ctk.CTkLabel(exposure_frame, text="", font=ctk.CTkFont(size=12),
+                                              justify="left", anchor="w", wraplength=900)
+        self.performance_label.pack(fill="x", padx=15, pady=(0, 8))
+        
         # Portfolio list
         self.portfolio_scroll = ctk.CTkScrollableFrame(right_panel)
         self.portfolio_scroll.pack(fill="both", expand=True, padx=10, pady=10)
@@ -562,8 +941,7 @@ class FinanceApp(ctk.CTk):
         self.show_market_news()
     
     def show_market_news(self):
-        for widget in self.research_content.winfo_children():
-            widget.destroy()
+        self.clear_children(self.research_content)
         
         ctk.CTkLabel(self.research_content, text="📰 Market News & Updates",
                     font=ctk.CTkFont(size=24, weight="bold")).pack(pady=20, anchor="w", padx=20)
@@ -594,166 +972,349 @@ class FinanceApp(ctk.CTk):
         if not symbol:
             return
         
-        for widget in self.research_content.winfo_children():
-            widget.destroy()
+        # Any search still in flight is now superseded
+        self.research_generation += 1
+        generation = self.research_generation
+        
+        self.clear_children(self.research_content)
         
         loading = ctk.CTkLabel(self.research_content, text=f"🔄 Researching {symbol}...",
                               font=ctk.CTkFont(size=18))
         loading.pack(pady=50)
         
         def fetch_research():
+            # Independent endpoints run concurrently; identical requests share one fetch
+            info_future = self.market_data.submit('info', symbol)
+            news_future = self.market_data.submit('news', symbol)
+            timeframes_future = self.market_data.flights.submit(
+                ('timeframes', symbol), self.get_multi_timeframe_analysis, symbol)
+            
             try:
-                ticker = yf.Ticker(symbol)
-                info = ticker.info
-                
-                # Clear loading
-                for widget in self.research_content.winfo_children():
-                    widget.destroy()
-                
-                # Header with add to watchlist
-                header_frame = ctk.CTkFrame(self.research_content, fg_color="transparent")
-                header_frame.pack(fill="x", padx=20, pady=20)
-                
-                company_name = info.get('longName', symbol)
-                ctk.CTkLabel(header_frame, text=f"{symbol} - {company_name}",
-                           font=ctk.CTkFont(size=28, weight="bold")).pack(side="left")
-                
-                ctk.CTkButton(header_frame, text="⭐ Add to Watchlist",
-                            command=lambda: self.add_to_watchlist(symbol),
-                            height=40).pack(side="right")
-                
-                # Company stats
-                stats_frame = ctk.CTkFrame(self.research_content, corner_radius=10)
-                stats_frame.pack(fill="x", padx=20, pady=10)
+                info = info_future.result()
+            except Exception as e:
+                self.schedule(lambda error=e: self.show_research_error(generation, symbol, error))
+                return
+            try:
+                news = news_future.result()
+            except Exception:
+                news = None
+            try:
+                timeframe_analyses = timeframes_future.result()
+            except Exception:
+                timeframe_analyses = {}
+            
+            self.schedule(lambda: self.render_research(generation, symbol, info, news, timeframe_analyses))
+        
+        thread = threading.Thread(target=fetch_research)
+        thread.daemon = True
+        thread.start()
+    
+    def show_research_error(self, generation, symbol, error):
+        if generation != self.research_generation or not self.research_content.winfo_exists():
+            return
+        self.clear_children(self.research_content)
+        ctk.CTkLabel(self.research_content, text=f"❌ Error: Could not research {symbol}\n{str(error)}",
+                   text_color="red", font=ctk.CTkFont(size=16)).pack(pady=50)
+    
+    def render_research(self, generation, symbol, info, news, timeframe_analyses):
+        """Draw a finished search, unless a newer one has started since"""
+        if generation != self.research_generation or not self.research_content.winfo_exists():
+            return
+        
+        def is_current():
+            return generation == self.research_generation
+        
+        self.exposure.update_fundamentals(symbol, info)
+        
+        try:
+            # Clear loading
+            self.clear_children(self.research_content)
+            
+            # Header with add to watchlist
+            header_frame = ctk.CTkFrame(self.research_content, fg_color="transparent")
+            header_frame.pack(fill="x", padx=20, pady=20)
+            
+            company_name = info.get('longName', symbol)
+            ctk.CTkLabel(header_frame, text=f"{symbol} - {company_name}",
+                       font=ctk.CTkFont(size=28, weight="bold")).pack(side="left")
+            
+            ctk.CTkButton(header_frame, text="⭐ Add to Watchlist",
+                        command=lambda: self.add_to_watchlist(symbol),
+                        height=40).pack(side="right")
+            
+            # Price chart
+            chart_frame = ctk.CTkFrame(self.research_content, corner_radius=10)
+            chart_frame.pack(fill="x", padx=20, pady=10)
+            
+            chart_header = ctk.CTkFrame(chart_frame, fg_color="transparent")
+            chart_header.pack(fill="x", padx=20, pady=(15, 0))
+            
+            ctk.CTkLabel(chart_header, text="📈 Price Chart",
+                       font=ctk.CTkFont(size=20, weight="bold")).pack(side="left")
+            
+            range_selector = ctk.CTkSegmentedButton(
+                chart_header, values=list(CHART_RANGES),
+                command=lambda r: self.load_chart(self.research_chart, symbol, r, is_current))
+            range_selector.set("1Y")
+            range_selector.pack(side="right")
+            
+            self.research_chart.attach(chart_frame, self.research_content)
+            self.load_chart(self.research_chart, symbol, "1Y", is_current)
+            
+            # Multi-timeframe signals
+            if timeframe_analyses:
+                tf_frame = ctk.CTkFrame(self.research_content, corner_radius=10)
+                tf_frame.pack(fill="x", padx=20, pady=10)
                 
-                ctk.CTkLabel(stats_frame, text="📊 Company Overview",
+                ctk.CTkLabel(tf_frame, text="⏱️ Multi-Timeframe Signals",
                            font=ctk.CTkFont(size=20, weight="bold")).pack(pady=15, padx=20, anchor="w")
                 
-                # Key stats grid
-                stats_grid = ctk.CTkFrame(stats_frame, fg_color="transparent")
-                stats_grid.pack(fill="x", padx=20, pady=10)
-                
-                market_cap = info.get('marketCap', 0)
-                market_cap_str = f"${market_cap/1e9:.2f}B" if market_cap > 1e9 else f"${market_cap/1e6:.2f}M"
-                
-                stats = [
-                    ("Current Price", f"${info.get('currentPrice', info.get('regularMarketPrice', 'N/A'))}"),
-                    ("Market Cap", market_cap_str),
-                    ("PE Ratio", f"{info.get('trailingPE', 'N/A'):.2f}" if isinstance(info.get('trailingPE'), (int, float)) else 'N/A'),
-                    ("52 Week High", f"${info.get('fiftyTwoWeekHigh', 'N/A')}"),
-                    ("52 Week Low", f"${info.get('fiftyTwoWeekLow', 'N/A')}"),
-                    ("Dividend Yield", f"{info.get('dividendYield', 0) * 100:.2f}%" if info.get('dividendYield') else 'N/A'),
-                    ("Volume", f"{info.get('volume', 0):,}"),
-                    ("Avg Volume", f"{info.get('averageVolume', 0):,}"),
-                    ("Beta", f"{info.get('beta', 'N/A'):.2f}" if isinstance(info.get('beta'), (int, float)) else 'N/A'),
-                    ("EPS", f"${info.get('trailingEps', 'N/A'):.2f}" if isinstance(info.get('trailingEps'), (int, float)) else 'N/A'),
-                    ("Sector", info.get('sector', 'N/A')),
-                    ("Industry", info.get('industry', 'N/A'))
-                ]
+                tf_grid = ctk.CTkFrame(tf_frame, fg_color="transparent")
+                tf_grid.pack(fill="x", padx=20, pady=(0, 15))
                 
-                row = 0
-                col = 0
-                for label, value in stats:
-                    stat_box = ctk.CTkFrame(stats_grid, width=250, height=70)
-                    stat_box.grid(row=row, column=col, padx=10, pady=10, sticky="ew")
-                    
-                    ctk.CTkLabel(stat_box, text=label, font=ctk.CTkFont(size=11),
-                               text_color="gray").pack(pady=(10, 0))
-                    ctk.CTkLabel(stat_box, text=str(value), font=ctk.CTkFont(size=16, weight="bold")).pack()
-                    
-                    col += 1
-                    if col > 2:
-                        col = 0
-                        row += 1
+                for col, header_text in enumerate(["Timeframe", "Signal", "RSI", "MA(20)", "MA(50)", "Range High", "Range Low"]):
+                    ctk.CTkLabel(tf_grid, text=header_text, font=ctk.CTkFont(size=11),
+                               text_color="gray").grid(row=0, column=col, padx=12, sticky="w")
                 
-                # Earnings & trends
-                earnings_frame = ctk.CTkFrame(self.research_content, corner_radius=10)
-                earnings_frame.pack(fill="x", padx=20, pady=10)
-                
-                ctk.CTkLabel(earnings_frame, text="💰 Financial Performance",
-                           font=ctk.CTkFont(size=20, weight="bold")).pack(pady=15, padx=20, anchor="w")
+                for row, (timeframe, tf_analysis) in enumerate(timeframe_analyses.items(), start=1):
+                    tf_signals = tf_analysis['signals']
+                    values = [
+                        timeframe,
+                        tf_signals['recommendation'],
+                        f"{tf_analysis['rsi']:.1f}",
+                        f"${tf_analysis['ma_20']:.2f}",
+                        f"${tf_analysis['ma_50']:.2f}",
+                        f"${tf_analysis['high_52w']:.2f}",
+                        f"${tf_analysis['low_52w']:.2f}"
+                    ]
+                    for col, value in enumerate(values):
+                        ctk.CTkLabel(tf_grid, text=value, font=ctk.CTkFont(size=13, weight="bold" if col < 2 else "normal"),
+                                   text_color=tf_signals['color'] if col == 1 else None).grid(row=row, column=col, padx=12, pady=2, sticky="w")
+            
+            # Company stats
+            stats_frame = ctk.CTkFrame(self.research_content, corner_radius=10)
+            stats_frame.pack(fill="x", padx=20, pady=10)
+            
+            ctk.CTkLabel(stats_frame, text="📊 Company Overview",
+                       font=ctk.CTkFont(size=20, weight="bold")).pack(pady=15, padx=20, anchor="w")
+            
+            # Key stats grid
+            stats_grid = ctk.CTkFrame(stats_frame, fg_color="transparent")
+            stats_grid.pack(fill="x", padx=20, pady=10)
+            
+            market_cap = info.get('marketCap', 0)
+            market_cap_str = f"${market_cap/1e9:.2f}B" if market_cap > 1e9 else f"${market_cap/1e6:.2f}M"
+            
+            stats = [
+                ("Current Price", f"${info.get('currentPrice', info.get('regularMarketPrice', 'N/A'))}"),
+                ("Market Cap", market_cap_str),
+                ("PE Ratio", f"{info.get('trailingPE', 'N/A'):.2f}" if isinstance(info.get('trailingPE'), (int, float)) else 'N/A'),
+                ("52 Week High", f"${info.get('fiftyTwoWeekHigh', 'N/A')}"),
+                ("52 Week Low", f"${info.get('fiftyTwoWeekLow', 'N/A')}"),
+                ("Dividend Yield", f"{info.get('dividendYield', 0) * 100:.2f}%" if info.get('dividendYield') else 'N/A'),
+                ("Volume", f"{info.get('volume', 0):,}"),
+                ("Avg Volume", f"{info.get('averageVolume', 0):,}"),
+                ("Beta", f"{info.get('beta', 'N/A'):.2f}" if isinstance(info.get('beta'), (int, float)) else 'N/A'),
+                ("EPS", f"${info.get('trailingEps', 'N/A'):.2f}" if isinstance(info.get('trailingEps'), (int, float)) else 'N/A'),
+                ("Sector", info.get('sector', 'N/A')),
+                ("Industry", info.get('industry', 'N/A'))
+            ]
+            
+            row = 0
+            col = 0
+            for label, value in stats:
+                stat_box = ctk.CTkFrame(stats_grid, width=250, height=70)
+                stat_box.grid(row=row, column=col, padx=10, pady=10, sticky="ew")
                 
-                revenue_growth = info.get('revenueGrowth', 0) * 100 if info.get('revenueGrowth') else 0
-                earnings_growth = info.get('earningsGrowth', 0) * 100 if info.get('earningsGrowth') else 0
-                profit_margins = info.get('profitMargins', 0) * 100 if info.get('profitMargins') else 0
-                roe = info.get('returnOnEquity', 0) * 100 if info.get('returnOnEquity') else 0
+                ctk.CTkLabel(stat_box, text=label, font=ctk.CTkFont(size=11),
+                           text_color="gray").pack(pady=(10, 0))
+                ctk.CTkLabel(stat_box, text=str(value), font=ctk.CTkFont(size=16, weight="bold")).pack()
                 
-                trends_text = f"""Revenue Growth: {revenue_growth:.2f}%
+                col += 1
+                if col > 2:
+                    col = 0
+                    row += 1
+            
+            # Earnings & trends
+            earnings_frame = ctk.CTkFrame(self.research_content, corner_radius=10)
+            earnings_frame.pack(fill="x", padx=20, pady=10)
+            
+            ctk.CTkLabel(earnings_frame, text="💰 Financial Performance",
+                       font=ctk.CTkFont(size=20, weight="bold")).pack(pady=15, padx=20, anchor="w")
+            
+            revenue_growth = info.get('revenueGrowth', 0) * 100 if info.get('revenueGrowth') else 0
+            earnings_growth = info.get('earningsGrowth', 0) * 100 if info.get('earningsGrowth') else 0
+            profit_margins = info.get('profitMargins', 0) * 100 if info.get('profitMargins') else 0
+            roe = info.get('returnOnEquity', 0) * 100 if info.get('returnOnEquity') else 0
+            
+            trends_text = f"""Revenue Growth: {revenue_growth:.2f}%
 Earnings Growth: {earnings_growth:.2f}%
 Profit Margins: {profit_margins:.2f}%
 Return on Equity: {roe:.2f}%
 Debt to Equity: {info.get('debtToEquity', 'N/A')}
 """
+            
+            ctk.CTkLabel(earnings_frame, text=trends_text.strip(),
+                       font=ctk.CTkFont(size=14), justify="left").pack(padx=20, pady=(0, 15), anchor="w")
+            
+            # Analyst recommendations
+            if info.get('recommendationKey'):
+                rec_frame = ctk.CTkFrame(self.research_content, corner_radius=10)
+                rec_frame.pack(fill="x", padx=20, pady=10)
                 
-                ctk.CTkLabel(earnings_frame, text=trends_text.strip(),
-                           font=ctk.CTkFont(size=14), justify="left").pack(padx=20, pady=(0, 15), anchor="w")
+                ctk.CTkLabel(rec_frame, text="🎯 Analyst Consensus",
+                           font=ctk.CTkFont(size=20, weight="bold")).pack(pady=15, padx=20, anchor="w")
                 
-                # Analyst recommendations
-                if info.get('recommendationKey'):
-                    rec_frame = ctk.CTkFrame(self.research_content, corner_radius=10)
-                    rec_frame.pack(fill="x", padx=20, pady=10)
-                    
-                    ctk.CTkLabel(rec_frame, text="🎯 Analyst Consensus",
-                               font=ctk.CTkFont(size=20, weight="bold")).pack(pady=15, padx=20, anchor="w")
-                    
-                    rec = info.get('recommendationKey', 'N/A').upper()
-                    target_high = info.get('targetHighPrice', 'N/A')
-                    target_low = info.get('targetLowPrice', 'N/A')
-                    target_mean = info.get('targetMeanPrice', 'N/A')
-                    
-                    rec_color = {
-                        'STRONG_BUY': '#00e676',
-                        'BUY': '#66bb6a',
-                        'HOLD': '#ffa726',
-                        'SELL': '#ff7043',
-                        'STRONG_SELL': '#ef5350'
-                    }.get(rec, 'gray')
-                    
-                    ctk.CTkLabel(rec_frame, text=f"Rating: {rec.replace('_', ' ')}",
-                               font=ctk.CTkFont(size=16, weight="bold"),
-                               text_color=rec_color).pack(padx=20, anchor="w")
-                    
-                    if target_mean != 'N/A':
-                        ctk.CTkLabel(rec_frame, text=f"Price Target: ${target_mean:.2f} (Range: ${target_low:.2f} - ${target_high:.2f})",
-                                   font=ctk.CTkFont(size=14)).pack(padx=20, pady=(5, 15), anchor="w")
+                rec = info.get('recommendationKey', 'N/A').upper()
+                target_high = info.get('targetHighPrice', 'N/A')
+                target_low = info.get('targetLowPrice', 'N/A')
+                target_mean = info.get('targetMeanPrice', 'N/A')
                 
-                # News section
-                news_frame = ctk.CTkFrame(self.research_content, corner_radius=10)
-                news_frame.pack(fill="x", padx=20, pady=10)
+                rec_color = {
+                    'STRONG_BUY': '#00e676',
+                    'BUY': '#66bb6a',
+                    'HOLD': '#ffa726',
+                    'SELL': '#ff7043',
+                    'STRONG_SELL': '#ef5350'
+                }.get(rec, 'gray')
                 
-                ctk.CTkLabel(news_frame, text="📰 Recent Company News",
-                           font=ctk.CTkFont(size=20, weight="bold")).pack(pady=15, padx=20, anchor="w")
+                ctk.CTkLabel(rec_frame, text=f"Rating: {rec.replace('_', ' ')}",
+                           font=ctk.CTkFont(size=16, weight="bold"),
+                           text_color=rec_color).pack(padx=20, anchor="w")
                 
-                try:
-                    news = ticker.news
-                    if news and len(news) > 0:
-                        for article in news[:5]:
-                            article_frame = ctk.CTkFrame(news_frame, fg_color="#1a1a1a")
-                            article_frame.pack(fill="x", padx=20, pady=5)
-                            
-                            ctk.CTkLabel(article_frame, text=article.get('title', 'No title'),
-                                       font=ctk.CTkFont(size=14), wraplength=700, anchor="w").pack(pady=8, padx=15, anchor="w")
-                            
-                            ctk.CTkLabel(article_frame, text=f"📅 {article.get('publisher', 'Unknown')}",
-                                       font=ctk.CTkFont(size=11), text_color="gray").pack(padx=15, pady=(0, 8), anchor="w")
-                    else:
-                        ctk.CTkLabel(news_frame, text="No recent news available for this stock.",
-                                   text_color="gray", font=ctk.CTkFont(size=12)).pack(padx=20, pady=10, anchor="w")
-                except:
-                    ctk.CTkLabel(news_frame, text="News temporarily unavailable. Check back later.",
+                if target_mean != 'N/A':
+                    ctk.CTkLabel(rec_frame, text=f"Price Target: ${target_mean:.2f} (Range: ${target_low:.2f} - ${target_high:.2f})",
+                               font=ctk.CTkFont(size=14)).pack(padx=20, pady=(5, 15), anchor="w")
+            
+            # News section
+            news_frame = ctk.CTkFrame(self.research_content, corner_radius=10)
+            news_frame.pack(fill="x", padx=20, pady=10)
+            
+            ctk.CTkLabel(news_frame, text="📰 Recent Company News",
+                       font=ctk.CTkFont(size=20, weight="bold")).pack(pady=15, padx=20, anchor="w")
+            
+            if news is not None:
+                if news and len(news) > 0:
+                    for article in news[:5]:
+                        article_frame = ctk.CTkFrame(news_frame, fg_color="#1a1a1a")
+                        article_frame.pack(fill="x", padx=20, pady=5)
+                        
+                        ctk.CTkLabel(article_frame, text=article.get('title', 'No title'),
+                                   font=ctk.CTkFont(size=14), wraplength=700, anchor="w").pack(pady=8, padx=15, anchor="w")
+                        
+                        ctk.CTkLabel(article_frame, text=f"📅 {article.get('publisher', 'Unknown')}",
+                                   font=ctk.CTkFont(size=11), text_color="gray").pack(padx=15, pady=(0, 8), anchor="w")
+                else:
+                    ctk.CTkLabel(news_frame, text="No recent news available for this stock.",
                                text_color="gray", font=ctk.CTkFont(size=12)).pack(padx=20, pady=10, anchor="w")
-                
+            else:
+                ctk.CTkLabel(news_frame, text="News temporarily unavailable. Check back later.",
+                           text_color="gray", font=ctk.CTkFont(size=12)).pack(padx=20, pady=10, anchor="w")
+        except Exception as e:
+            self.show_research_error(generation, symbol, e)
+    
+    def load_chart(self, chart, symbol, chart_range, is_current=None):
+        period, interval = CHART_RANGES[chart_range]
+        
+        def fetch_history():
+            try:
+                if chart_range == "1Y":
+                    # Shares the cached daily download used by the analysis
+                    hist = self.market_data.get_bars(symbol, "1d").iloc[-252:]
+                else:
+                    hist = self.market_data.flights.do(
+                        ('chart', symbol, period, interval),
+                        self.market_data.provider.history, symbol, period, interval)
+                if not hist.empty and (is_current is None or is_current()):
+                    chart.load(symbol, hist)
             except Exception as e:
-                for widget in self.research_content.winfo_children():
-                    widget.destroy()
-                ctk.CTkLabel(self.research_content, text=f"❌ Error: Could not research {symbol}\n{str(e)}",
-                           text_color="red", font=ctk.CTkFont(size=16)).pack(pady=50)
+                print(f"Error loading chart for {symbol}: {e}")
         
-        thread = threading.Thread(target=fetch_research)
+        thread = threading.Thread(target=fetch_history)
         thread.daemon = True
         thread.start()
     
+    def clear_children(self, container):
+        """Destroy container's widgets except the chart canvases, which the next render reuses"""
+        keep = {self.research_chart.widget(), self.position_chart.widget()}
+        for widget in container.winfo_children():
+            if widget not in keep:
+                widget.destroy()
+    
+    def toggle_position_chart(self, symbol):
+        if self.position_chart_symbol == symbol:
+            self.position_chart_symbol = None
+            self.update_portfolio_display()
+            return
+        
+        self.position_chart_symbol = symbol
+        self.update_portfolio_display()
+        self.load_chart(self.position_chart, symbol, "1Y")
+    
+    def evaluate_alerts(self, symbol, analysis):
+        """Feed fresh data for one symbol to the alert engine"""
+        snapshot = {
+            'price': float(analysis['current_price']),
+            'rsi': float(analysis['rsi']),
+            'recommendation': analysis['signals']['recommendation']
+        }
+        for stock in self.portfolio:
+            if stock['symbol'] == symbol and stock['purchase_price'] > 0:
+                snapshot['gain_pct'] = (snapshot['price'] / stock['purchase_price'] - 1) * 100
+                break
+        self.alert_engine.update(symbol, snapshot)
+    
+    def add_alert(self):
+        try:
+            rule = parse_rule(self.alert_entry.get())
+        except ValueError as e:
+            self.status_label.configure(text=f"❌ {e}", text_color="red")
+            return
+        
+        self.alert_engine.add_rule(rule['symbol'], rule['kind'], rule['threshold'])
+        self.alert_entry.delete(0, 'end')
+        self.update_alerts_display()
+    
+    def remove_alert(self, rule_id):
+        self.alert_engine.remove_rule(rule_id)
+        self.update_alerts_display()
+    
+    def show_alerts(self, alerts):
+        self.recent_alerts = ([alert.message for alert in alerts] + self.recent_alerts)[:20]
+        if hasattr(self, 'status_label') and self.status_label.winfo_exists():
+            self.status_label.configure(text=alerts[-1].message, text_color="#ffa726")
+        if hasattr(self, 'alerts_display') and self.alerts_display.winfo_exists():
+            self.update_alerts_display()
+    
+    def update_alerts_display(self):
+        for widget in self.alerts_display.winfo_children():
+            widget.destroy()
+        
+        for message in self.recent_alerts[:5]:
+            ctk.CTkLabel(self.alerts_display, text=message, font=ctk.CTkFont(size=11),
+                        text_color="#ffa726", wraplength=260, justify="left").pack(anchor="w")
+        
+        rules = list(self.alert_engine.rules.values())
+        if not rules and not self.recent_alerts:
+            ctk.CTkLabel(self.alerts_display, text="No alerts set", text_color="gray").pack(pady=5)
+            return
+        
+        for rule in rules[:50]:
+            rule_item = ctk.CTkFrame(self.alerts_display, fg_color="transparent")
+            rule_item.pack(fill="x")
+            
+            ctk.CTkLabel(rule_item, text=describe_rule(rule), font=ctk.CTkFont(size=12)).pack(side="left", padx=5)
+            ctk.CTkButton(rule_item, text="❌", width=24, height=20,
+                         command=lambda r=rule['id']: self.remove_alert(r),
+                         fg_color="transparent", hover_color="#d32f2f").pack(side="right")
+        
+        if len(rules) > 50:
+            ctk.CTkLabel(self.alerts_display, text=f"+ {len(rules) - 50} more",
+                        text_color="gray", font=ctk.CTkFont(size=11)).pack(anchor="w", padx=5)
+    
     def add_to_watchlist(self, symbol):
+        if not self.require_loaded():
+            return
         if symbol not in self.watchlist:
             self.watchlist.append(symbol)
             self.save_data()
@@ -762,8 +1323,13 @@ Debt to Equity: {info.get('debtToEquity', 'N/A')}
                 self.status_label.configure(text=f"✅ Added {symbol} to watchlist", text_color="green")
     
     def update_watchlist_display(self):
+        if not hasattr(self, 'watchlist_display') or not self.watchlist_display.winfo_exists():
+            return
+        
         for widget in self.watchlist_display.winfo_children():
             widget.destroy()
+        self.watchlist_rows = {}
+        self.watchlist_items = {}
         
         if not self.watchlist:
             ctk.CTkLabel(self.watchlist_display, text="No stocks in watchlist",
@@ -774,21 +1340,196 @@ Debt to Equity: {info.get('debtToEquity', 'N/A')}
             watch_item = ctk.CTkFrame(self.watchlist_display)
             watch_item.pack(fill="x", pady=5, padx=5)
             
-            ctk.CTkLabel(watch_item, text=symbol, font=ctk.CTkFont(size=14, weight="bold")).pack(side="left", padx=10)
+            top_row = ctk.CTkFrame(watch_item, fg_color="transparent")
+            top_row.pack(fill="x")
+            
+            ctk.CTkLabel(top_row, text=symbol, font=ctk.CTkFont(size=14, weight="bold")).pack(side="left", padx=10)
             
-            ctk.CTkButton(watch_item, text="❌", width=30, command=lambda s=symbol: self.remove_from_watchlist(s),
+            ctk.CTkButton(top_row, text="❌", width=30, command=lambda s=symbol: self.remove_from_watchlist(s),
                          fg_color="transparent", hover_color="#d32f2f").pack(side="right", padx=5)
+            
+            change_label = ctk.CTkLabel(top_row, text="", font=ctk.CTkFont(size=12))
+            change_label.pack(side="right", padx=5)
+            price_label = ctk.CTkLabel(top_row, text="…", font=ctk.CTkFont(size=13, weight="bold"))
+            price_label.pack(side="right", padx=5)
+            
+            detail_label = ctk.CTkLabel(watch_item, text="", font=ctk.CTkFont(size=11), text_color="gray")
+            detail_label.pack(anchor="w", padx=10, pady=(0, 5))
+            
+            self.watchlist_rows[symbol] = (price_label, change_label, detail_label)
+            self.watchlist_items[symbol] = watch_item
+            quote = self.watchlist_quotes.get(symbol)
+            if quote:
+                self.show_quote(symbol, quote)
+    
+    def show_quote(self, symbol, quote):
+        price_label, change_label, detail_label = self.watchlist_rows[symbol]
+        color = "#00e676" if quote['change_pct'] >= 0 else "#ef5350"
+        sign = "+" if quote['change_pct'] >= 0 else ""
+        price_label.configure(text=f"${quote['price']:,.2f}",
+                              text_color="gray" if quote.get('stale') else "#DCE4EE")
+        change_label.configure(text=f"{sign}{quote['change_pct']:.2f}%", text_color=color)
+        detail_label.configure(text=f"RSI {quote['rsi']:.1f} • {quote['recommendation']}")
+    
+    def visible_watchlist_symbols(self):
+        """Symbols whose rows are currently scrolled into view, from the rows' screen positions"""
+        # The scrollable frame's Tk parent is the viewport it scrolls inside
+        viewport = self.nametowidget(self.watchlist_display.winfo_parent())
+        height = viewport.winfo_height()
+        if not self.watchlist_items or height <= 1:
+            # Not laid out yet
+            return list(self.watchlist)
+        top = viewport.winfo_rooty()
+        bottom = top + height
+        return [symbol for symbol, item in self.watchlist_items.items()
+                if item.winfo_rooty() < bottom and item.winfo_rooty() + item.winfo_height() > top]
+    
+    def poll_watchlist(self):
+        """Poll watchlist quotes at a rate that follows the market session"""
+        delay = POLL_INTERVALS[market_session(self.market_data.provider.now())]
+        self.after(delay * 1000, self.poll_watchlist)
+        self.refresh_watchlist_quotes()
+    
+    def refresh_watchlist_quotes(self):
+        """Fetch quotes for visible watchlist rows in one batched request"""
+        if (self.current_view != "portfolio" or self.watchlist_poll_running
+                or not self.watchlist_rows or not self.watchlist_display.winfo_exists()):
+            return
+        
+        symbols = [s for s in self.visible_watchlist_symbols() if s in self.watchlist_rows]
+        if not symbols:
+            return
+        self.watchlist_poll_running = True
+        
+        def fetch_quotes():
+            quotes = {}
+            try:
+                quotes = self.compute_quotes(self.market_data.refresh_tail(symbols))
+            except Exception as e:
+                print(f"Error polling watchlist: {e}")
+            self.schedule(lambda: self.apply_quotes(quotes))
+        
+        thread = threading.Thread(target=fetch_quotes)
+        thread.daemon = True
+        thread.start()
+    
+    def compute_quotes(self, bars):
+        quotes = {}
+        for symbol, hist in bars.items():
+            analysis = self.analyze_history(hist)
+            if not analysis or len(hist) < 2:
+                continue
+            previous_close = float(hist['Close'].iloc[-2])
+            quotes[symbol] = {
+                'price': float(analysis['current_price']),
+                'change_pct': (float(analysis['current_price']) / previous_close - 1) * 100,
+                'rsi': float(analysis['rsi']),
+                'recommendation': analysis['signals']['recommendation']
+            }
+            self.evaluate_alerts(symbol, analysis)
+        
+        # Keep a snapshot so the next launch has something to show straight away
+        if quotes:
+            snapshot = dict(self.watchlist_quotes)
+            snapshot.update(quotes)
+            with open('watchlist_quotes.json.tmp', 'w') as f:
+                json.dump(snapshot, f)
+            os.replace('watchlist_quotes.json.tmp', 'watchlist_quotes.json')
+        return quotes
+    
+    def apply_quotes(self, quotes):
+        self.watchlist_poll_running = False
+        self.watchlist_quotes.update(quotes)
+        if not hasattr(self, 'watchlist_display') or not self.watchlist_display.winfo_exists():
+            return
+        for symbol, quote in quotes.items():
+            if symbol in self.watchlist_rows:
+                self.show_quote(symbol, quote)
     
     def remove_from_watchlist(self, symbol):
+        if not self.require_loaded():
+            return
         if symbol in self.watchlist:
             self.watchlist.remove(symbol)
             self.save_data()
             self.update_watchlist_display()
     
+    def change_transaction_type(self, txn_type):
+        placeholders = {
+            "Buy": ("Shares", "Purchase Price"),
+            "Sell": ("Shares", "Sale Price"),
+            "Dividend": ("Shares (blank = all held)", "Dividend per Share"),
+            "Split": ("Split Ratio (e.g., 2 for 2:1)", "Not used")
+        }
+        shares_hint, price_hint = placeholders[txn_type]
+        self.shares_entry.configure(placeholder_text=shares_hint)
+        self.price_entry.configure(placeholder_text=price_hint)
+    
+    def change_cost_method(self, method):
+        if not self.require_loaded():
+            return
+        self.cost_method = method.lower()
+        self.sync_portfolio()
+        self.update_portfolio_display()
+    
+    def switch_account(self, name):
+        if name == self.current_account:
+            return
+        if not self.require_loaded():
+            self.account_menu.set(self.current_account)
+            return
+        self.select_account(name)
+        self.accounts.save()
+        self.update_portfolio_display()
+        self.update_history()
+    
+    def new_account(self):
+        if not self.require_loaded():
+            return
+        name = ctk.CTkInputDialog(text="Account name:", title="New Account").get_input()
+        if not name:
+            return
+        try:
+            self.accounts.create(name)
+        except ValueError as e:
+            self.status_label.configure(text=f"❌ {e}", text_color="red")
+            return
+        self.account_menu.configure(values=self.accounts.views())
+        self.account_menu.set(name.strip())
+        self.switch_account(name.strip())
+        self.status_label.configure(text=f"✅ Created account {name.strip()}", text_color="green")
+    
+    def require_loaded(self):
+        """Changes wait until load_data has finished on the warm-up thread"""
+        if not self.data_loaded:
+            if hasattr(self, 'status_label') and self.status_label.winfo_exists():
+                self.status_label.configure(text="⏳ Still loading your portfolio...", text_color="blue")
+            return False
+        return True
+    
+    def require_account(self):
+        """Transactions go into one account; the consolidated view is read-only"""
+        if self.current_account == CONSOLIDATED:
+            self.status_label.configure(text="❌ Select an account first", text_color="red")
+            return False
+        return True
+    
     def add_stock(self):
         symbol = self.symbol_entry.get().upper().strip()
         shares_text = self.shares_entry.get().strip()
         price_text = self.price_entry.get().strip()
+        txn_type = self.txn_type_menu.get().lower()
+        
+        if not self.require_loaded() or not self.require_account():
+            return
+        
+        position = self.ledger.position(symbol)
+        held = position.shares if position else 0
+        
+        if txn_type == "split":
+            price_text = price_text or "0"
+        elif txn_type == "dividend" and not shares_text:
+            shares_text = str(held)
         
         if not symbol or not shares_text or not price_text:
             self.status_label.configure(text="❌ Fill all fields", text_color="red")
@@ -798,13 +1539,35 @@ Debt to Equity: {info.get('debtToEquity', 'N/A')}
             shares = float(shares_text)
             purchase_price = float(price_text)
             
-            if shares <= 0 or purchase_price <= 0:
+            if shares <= 0 or purchase_price < 0 or (txn_type != "split" and purchase_price == 0):
                 self.status_label.configure(text="❌ Values must be positive", text_color="red")
                 return
         except ValueError:
             self.status_label.configure(text="❌ Invalid numbers", text_color="red")
             return
         
+        if txn_type != "buy" and held <= 0:
+            self.status_label.configure(text=f"❌ No {symbol} position", text_color="red")
+            return
+        
+        if txn_type != "buy" or symbol in self.symbol_cache:
+            # Known symbol (held here or in another account): no need to re-analyze
+            try:
+                if txn_type == "dividend":
+                    self.ledger.dividend(symbol, shares * purchase_price)
+                else:
+                    self.ledger.record(txn_type, symbol, shares, purchase_price)
+            except ValueError as e:
+                self.status_label.configure(text=f"❌ {e}", text_color="red")
+                return
+            self.sync_portfolio()
+            self.save_data()
+            self.update_history()
+            self.update_portfolio_display()
+            self.clear_entries()
+            self.status_label.configure(text=f"✅ Recorded {txn_type} of {symbol}", text_color="green")
+            return
+        
         self.status_label.configure(text="⏳ Analyzing stock...", text_color="blue")
         self.update()
         
@@ -816,22 +1579,16 @@ Debt to Equity: {info.get('debtToEquity', 'N/A')}
                     self.status_label.configure(text=f"❌ Invalid symbol", text_color="red")
                     return
                 
-                stock_data = {
-                    'symbol': symbol,
-                    'shares': shares,
-                    'purchase_price': purchase_price,
-                    'current_price': analysis['current_price'],
-                    'date_added': datetime.now().strftime("%Y-%m-%d"),
-                    'analysis': analysis
-                }
-                
-                self.portfolio.append(stock_data)
+                self.ledger.buy(symbol, shares, purchase_price)
+                self.sync_portfolio()
+                self.apply_analyses({symbol: analysis})
+                self.load_fundamentals(symbol)
+                self.fundamentals.save()
                 self.save_data()
+                self.update_history()
                 self.update_portfolio_display()
                 
-                self.symbol_entry.delete(0, 'end')
-                self.shares_entry.delete(0, 'end')
-                self.price_entry.delete(0, 'end')
+                self.clear_entries()
                 
                 self.status_label.configure(text=f"✅ Added {symbol}!", text_color="green")
             except Exception as e:
@@ -841,9 +1598,18 @@ Debt to Equity: {info.get('debtToEquity', 'N/A')}
         thread.daemon = True
         thread.start()
     
+    def clear_entries(self):
+        self.symbol_entry.delete(0, 'end')
+        self.shares_entry.delete(0, 'end')
+        self.price_entry.delete(0, 'end')
+    
     def update_portfolio_display(self):
-        for widget in self.portfolio_scroll.winfo_children():
-            widget.destroy()
+        self.clear_children(self.portfolio_scroll)
+        
+        if not self.data_loaded:
+            ctk.CTkLabel(self.portfolio_scroll, text="⏳ Loading portfolio...",
+                        font=ctk.CTkFont(size=16), text_color="gray").pack(pady=50)
+            return
         
         if not self.portfolio:
             ctk.CTkLabel(self.portfolio_scroll, text="No stocks in portfolio\nAdd your first stock!",
@@ -877,13 +1643,27 @@ Debt to Equity: {info.get('debtToEquity', 'N/A')}
                          command=lambda idx=i: self.delete_stock(idx),
                          fg_color="transparent", hover_color="#d32f2f").pack(side="right")
             
+            ctk.CTkButton(header, text="📈", width=30,
+                         command=lambda s=stock['symbol']: self.toggle_position_chart(s),
+                         fg_color="transparent", hover_color="gray30").pack(side="right")
+            
+            if stock['symbol'] not in self.fresh_symbols:
+                ctk.CTkLabel(header, text="🕓 last saved analysis, updating...",
+                            font=ctk.CTkFont(size=11), text_color="gray").pack(side="left", padx=15)
+            
             # Price info
             price_frame = ctk.CTkFrame(stock_frame, fg_color="transparent")
             price_frame.pack(fill="x", padx=15, pady=5)
             
-            details = f"💼 {stock['shares']:.2f} shares | 📊 Bought at ${stock['purchase_price']:.2f} | 💵 Now ${stock['current_price']:.2f}"
+            details = f"💼 {stock['shares']:.2f} shares | 📊 Avg cost ${stock['purchase_price']:.2f} ({self.cost_method.upper()}) | 💵 Now ${stock['current_price']:.2f}"
             ctk.CTkLabel(price_frame, text=details, font=ctk.CTkFont(size=13)).pack(side="left")
             
+            realized = stock.get('realized', 0)
+            dividends = stock.get('dividends', 0)
+            if realized or dividends:
+                ctk.CTkLabel(price_frame, text=f"Realized ${realized:,.2f} | Dividends ${dividends:,.2f}",
+                            font=ctk.CTkFont(size=12), text_color="gray").pack(side="right")
+            
             # Gain/loss
             color = "#00e676" if gain_loss >= 0 else "#ef5350"
             sign = "+" if gain_loss >= 0 else ""
@@ -940,42 +1720,104 @@ Debt to Equity: {info.get('debtToEquity', 'N/A')}
                 tech_frame = ctk.CTkFrame(analysis_frame, fg_color="#0d0d0d", corner_radius=5)
                 tech_frame.pack(fill="x", padx=15, pady=(0, 10))
                 
-                rsi = analysis.get('rsi', 0)
-                rsi_color = "#00e676" if rsi < 30 else "#ef5350" if rsi > 70 else "#ffa726"
+                # A symbol with only a few bars has no RSI or volatility yet
+                rsi = analysis.get('rsi')
+                volatility = analysis.get('volatility')
+                rsi_text = f"{rsi:.1f}" if rsi is not None else "N/A"
+                volatility_text = f"{volatility:.2f}%" if volatility is not None else "N/A"
                 
-                tech_text = f"📊 RSI: {rsi:.1f} | MA(7): ${analysis.get('ma_7', 0):.2f} | MA(20): ${analysis.get('ma_20', 0):.2f} | Volatility: {analysis.get('volatility', 0):.2f}%"
+                tech_text = f"📊 RSI: {rsi_text} | MA(7): ${analysis.get('ma_7', 0):.2f} | MA(20): ${analysis.get('ma_20', 0):.2f} | Volatility: {volatility_text}"
                 ctk.CTkLabel(tech_frame, text=tech_text,
                            font=ctk.CTkFont(size=10), text_color="#808080").pack(pady=8, padx=10)
+            
+            # Chart stays loaded across redraws; only the last price is blitted in
+            if stock['symbol'] == self.position_chart_symbol:
+                chart_frame = ctk.CTkFrame(stock_frame, fg_color="#1a1a1a", corner_radius=8)
+                chart_frame.pack(fill="x", padx=15, pady=(0, 10))
+                self.position_chart.attach(chart_frame, self.portfolio_scroll)
+                self.position_chart.update_last_price(stock['current_price'])
         
         # Update summary
         total_gain = total_value - total_cost
         total_gain_pct = (total_gain / total_cost) * 100 if total_cost > 0 else 0
         sign = "+" if total_gain >= 0 else ""
+        realized = (self.accounts.realized_pnl(self.current_account, self.cost_method) +
+                    self.accounts.dividend_income(self.current_account))
+        realized_sign = "+" if realized >= 0 else ""
         
         self.portfolio_summary.configure(
-            text=f"Total: ${total_value:,.2f} | {sign}${total_gain:,.2f} ({sign}{total_gain_pct:.1f}%)")
+            text=f"Total: ${total_value:,.2f} | {sign}${total_gain:,.2f} ({sign}{total_gain_pct:.1f}%)"
+                 f" | Realized: {realized_sign}${realized:,.2f}")
+        self.update_exposure_display()
+        self.update_performance_display()
+    
+    def update_exposure_display(self):
+        if not hasattr(self, 'exposure_label') or not self.exposure_label.winfo_exists():
+            return
+        
+        summary = self.exposure.summary()
+        if not summary['total']:
+            self.exposure_label.configure(text="🧭 Exposure: no positions")
+            return
+        
+        def top(group, count):
+            return " · ".join(f"{name} {weight * 100:.0f}%" for name, weight in summary['weights'][group][:count])
+        
+        beta = f"{summary['beta']:.2f}" if summary['beta'] is not None else "N/A"
+        pe = f"{summary['pe']:.1f}" if summary['pe'] is not None else "N/A"
+        self.exposure_label.configure(
+            text=f"🧭 Sectors: {top('sector', 5)}\n"
+                 f"🏭 Industries: {top('industry', 4)}\n"
+                 f"🏢 Size: {top('cap_bucket', 5)}  |  β {beta}  |  P/E {pe}")
+    
+    def update_performance_display(self):
+        if not hasattr(self, 'performance_label') or not self.performance_label.winfo_exists():
+            return
+        
+        metrics = self.performance
+        if not metrics:
+            self.performance_label.configure(text="📊 Performance: no history yet")
+            return
+        
+        def pct(value):
+            return f"{value * 100:+.1f}%" if value is not None else "N/A"
+        
+        sharpe = f"{metrics['sharpe']:.2f}" if metrics['sharpe'] is not None else "N/A"
+        leaders = " · ".join(f"{symbol} {contribution * 100:+.1f}pp"
+                             for symbol, pnl, contribution in metrics['attribution'][:3])
+        self.performance_label.configure(
+            text=f"📊 Since {metrics['start']}: TWR {pct(metrics['twr'])} | MWR {pct(metrics['mwr'])}/yr"
+                 f" | Sharpe (3M) {sharpe} | Max DD {pct(metrics['max_drawdown'])}\n"
+                 f"🏆 Contribution: {leaders}")
     
     def delete_stock(self, index):
+        """Remove a position entered by mistake, with its transactions; sales go through the Sell form"""
+        if not self.require_loaded() or not self.require_account():
+            return
         if 0 <= index < len(self.portfolio):
-            self.portfolio.pop(index)
+            stock = self.portfolio[index]
+            self.ledger.remove(stock['symbol'])
+            self.sync_portfolio()
             self.save_data()
+            self.update_history()
             self.update_portfolio_display()
     
     def refresh_portfolio(self):
-        if not self.portfolio:
+        if not self.require_loaded():
+            return
+        symbols = self.accounts.symbols()
+        if not symbols:
             return
         
         self.status_label.configure(text="🔄 Refreshing all stocks...", text_color="blue")
         self.update()
         
         def refresh():
-            for stock in self.portfolio:
-                analysis = self.get_advanced_analysis(stock['symbol'])
-                if analysis:
-                    stock['current_price'] = analysis['current_price']
-                    stock['analysis'] = analysis
-            
+            # Each symbol once, however many accounts hold it
+            analyses = self.get_batch_analysis(symbols)
+            self.apply_analyses(analyses)
             self.save_data()
+            self.update_history()
             self.update_portfolio_display()
             self.status_label.configure(text="✅ Portfolio updated!", text_color="green")
         
@@ -983,9 +1825,98 @@ Debt to Equity: {info.get('debtToEquity', 'N/A')}
         thread.daemon = True
         thread.start()
     
+    def import_portfolio(self):
+        if not self.require_loaded() or not self.require_account():
+            return
+        path = filedialog.askopenfilename(title="Import broker export",
+                                          filetypes=[("Broker exports", "*.csv *.ofx *.qfx"), ("All files", "*.*")])
+        if not path:
+            return
+        
+        self.status_label.configure(text="⏳ Importing...", text_color="blue")
+        self.update()
+        
+        account, base, base_size = self.current_account, self.ledger, len(self.ledger)
+        
+        def run_import():
+            try:
+                skipped = []
+                rows = []
+                for chunk in read_transactions(path, skipped=skipped):
+                    rows.extend(chunk)
+                    self.schedule(lambda n=len(rows): self.status_label.configure(
+                        text=f"⏳ Read {n:,} transactions...", text_color="blue"))
+                
+                # One pass over the whole file in date order (exports are often newest first),
+                # applied to a copy so a bad file leaves the current book untouched
+                ledger = TransactionLedger()
+                ledger.extend(base.transactions)
+                count = ledger.extend(chronological(rows))
+                
+                # Price the open positions with one batched download. Rows are kept even when a
+                # symbol has no data (delisted, or the download failed); the user can remove typos.
+                held = [symbol for symbol, holding in ledger.holdings.items() if holding.shares > 0]
+                try:
+                    bars = self.market_data.download(held) if held else {}
+                    fetch_error = None
+                except Exception as e:
+                    bars, fetch_error = {}, e
+                analyses = self.analyze_bars(bars)
+                self.schedule(lambda: self.finish_import(account, base, base_size, ledger, analyses, count,
+                                                         len(skipped), set(held) - set(bars), fetch_error))
+            except Exception as e:
+                self.schedule(lambda error=e: self.status_label.configure(
+                    text=f"❌ Import failed: {error}", text_color="red"))
+        
+        thread = threading.Thread(target=run_import)
+        thread.daemon = True
+        thread.start()
+    
+    def finish_import(self, account, base, base_size, ledger, analyses, count, skipped, missing, fetch_error):
+        """Swap the imported ledger in on the Tk thread, unless the account changed meanwhile"""
+        if self.accounts.ledgers.get(account) is not base or len(base) != base_size:
+            self.status_label.configure(text=f"❌ {account} changed during the import; import again",
+                                        text_color="red")
+            return
+        self.accounts.replace(account, ledger)
+        self.accounts.save(account)
+        self.ledger = self.accounts.ledger(self.current_account)
+        self.sync_portfolio()
+        self.apply_analyses(analyses)
+        self.save_data()
+        self.update_history()
+        self.update_portfolio_display()
+        
+        message = f"✅ Imported {count:,} transactions"
+        if skipped:
+            message += f", skipped {skipped:,} unreadable rows"
+        if fetch_error is not None:
+            message += f" (prices unavailable: {fetch_error})"
+        elif missing:
+            missing = sorted(missing)
+            message += f" (no market data for {', '.join(missing[:5])}{'...' if len(missing) > 5 else ''})"
+        self.status_label.configure(text=message, text_color="green")
+    
+    def export_portfolio(self):
+        path = filedialog.asksaveasfilename(title="Export portfolio", defaultextension=".csv",
+                                            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl")])
+        if not path:
+            return
+        
+        try:
+            count = export_positions(path, self.portfolio)
+            self.status_label.configure(text=f"✅ Exported {count} positions", text_color="green")
+        except OSError as e:
+            self.status_label.configure(text=f"❌ Export failed: {e}", text_color="red")
+    
     def clear_portfolio(self):
-        self.portfolio = []
+        if not self.require_loaded() or not self.require_account():
+            return
+        self.ledger = TransactionLedger()
+        self.accounts.replace(self.current_account, self.ledger)
+        self.sync_portfolio()
         self.save_data()
+        self.update_history()
         self.update_portfolio_display()
         self.status_label.configure(text="✅ Portfolio cleared", text_color="green")
 
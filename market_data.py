@@ -0,0 +1,261 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+# Each timeframe is served from a cached source download, resampled locally when
+# it is coarser than the source. range_bars is the window used for the range
+# high/low (252 daily bars = 52 weeks), and the source period always covers it
+# plus warm-up for the 50-bar moving average. week_bars and month_bars are how
+# many bars back the week and month price changes look (a session is 390 1m, 78
+# 5m or 7 1h bars; daily bars compare the last 7 and 30 closes). stats_bars is
+# the window for average volume and volatility, three months where the source
+# reaches that far. Every look-back fits inside the source period (7 sessions of
+# 1m bars, about 40 of 5m), so on 1m the month change spans only 6 sessions.
+TIMEFRAMES = {
+    '1m': {'source': '1m', 'period': '7d', 'rule': None, 'range_bars': 390,
+           'week_bars': 1950, 'month_bars': 2340, 'stats_bars': 2340},
+    '5m': {'source': '5m', 'period': '60d', 'rule': None, 'range_bars': 390,
+           'week_bars': 390, 'month_bars': 1638, 'stats_bars': 3120},
+    '1h': {'source': '5m', 'period': '60d', 'rule': '1h', 'range_bars': 140,
+           'week_bars': 35, 'month_bars': 147, 'stats_bars': 280},
+    '1d': {'source': '1d', 'period': '2y', 'rule': None, 'range_bars': 252,
+           'week_bars': 6, 'month_bars': 29, 'stats_bars': 63},
+    '1wk': {'source': '1d', 'period': '2y', 'rule': 'W-FRI', 'range_bars': 52,
+            'week_bars': 1, 'month_bars': 4, 'stats_bars': 13},
+}
+
+# How long a source download stays fresh, in seconds
+SOURCE_TTL = {'1m': 30, '5m': 60, '1d': 300}
+INFO_TTL = 3600
+NEWS_TTL = 300
+
+# Intraday buckets start at the 9:30 open rather than on the hour; weekly bars
+# keep pandas' default of closing on (and being labelled by) the Friday
+RESAMPLE_OPTIONS = {'1h': {'offset': '30min', 'label': 'left', 'closed': 'left'}}
+
+# Watchlist polling interval in seconds for each market session
+POLL_INTERVALS = {'open': 15, 'extended': 60, 'closed': 300}
+
+MARKET_TZ = ZoneInfo('America/New_York')
+
+OHLCV = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+
+def resample_bars(hist, rule):
+    """Aggregate finer OHLCV bars into coarser ones"""
+    bars = hist.resample(rule, **RESAMPLE_OPTIONS.get(rule, {}))
+    return bars.agg({column: how for column, how in OHLCV.items() if column in hist.columns}).dropna(subset=['Close'])
+
+
+def market_session(now=None):
+    """Current US equity session: 'open', 'extended' (pre/post market) or 'closed'"""
+    now = now or datetime.now(MARKET_TZ)
+    if now.weekday() >= 5:
+        return 'closed'
+    minutes = now.hour * 60 + now.minute
+    if 9 * 60 + 30 <= minutes < 16 * 60:
+        return 'open'
+    if 4 * 60 <= minutes < 20 * 60:
+        return 'extended'
+    return 'closed'
+
+
+class SingleFlight:
+    """Collapses concurrent identical requests into one in-flight call.
+
+    The first caller for a key runs the function; anyone asking for the same
+    key before it finishes gets the same Future instead of a second request.
+    """
+
+    def __init__(self, max_workers=8):
+        self.lock = threading.Lock()
+        self.inflight = {}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _claim(self, key):
+        with self.lock:
+            future = self.inflight.get(key)
+            if future is not None:
+                return future, False
+            future = self.inflight[key] = Future()
+            return future, True
+
+    def _run(self, key, future, fn, args):
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            with self.lock:
+                self.inflight.pop(key, None)
+            future.set_exception(e)
+        else:
+            with self.lock:
+                self.inflight.pop(key, None)
+            future.set_result(result)
+
+    def submit(self, key, fn, *args):
+        """Start (or join) the call for key in the background and return its Future"""
+        future, leader = self._claim(key)
+        if leader:
+            self.executor.submit(self._run, key, future, fn, args)
+        return future
+
+    def do(self, key, fn, *args):
+        """Run (or join) the call for key in this thread and return its result"""
+        future, leader = self._claim(key)
+        if leader:
+            self._run(key, future, fn, args)
+        return future.result()
+
+
+class MarketData:
+    """Shared cache of price history keyed by symbol and source interval.
+
+    All timeframes built from the same source share one download, and the
+    derived (resampled) frames are cached against the source they came from.
+    Every request goes through provider (see providers.py), so the same
+    cache works against Yahoo, a recording session or a playback archive.
+    """
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.lock = threading.Lock()
+        # (symbol, source interval) -> (fetched_at, DataFrame)
+        self.sources = {}
+        # (symbol, timeframe) -> (fetched_at of source, DataFrame)
+        self.derived = {}
+        # symbol -> (fetched_at, info dict), symbol -> (fetched_at, news list)
+        self.info = {}
+        self.news = {}
+        self.flights = SingleFlight()
+
+    def _fresh(self, entry, interval):
+        return entry is not None and time.time() - entry[0] < SOURCE_TTL[interval]
+
+    def get_source(self, symbol, interval):
+        key = (symbol, interval)
+        with self.lock:
+            entry = self.sources.get(key)
+        if self._fresh(entry, interval):
+            return entry
+        period = next(tf['period'] for tf in TIMEFRAMES.values() if tf['source'] == interval)
+        return self.flights.do(('history', symbol, interval), self._fetch_source, symbol, interval, period)
+
+    def _fetch_source(self, symbol, interval, period):
+        hist = self.provider.history(symbol, period, interval)
+        return self.put_source(symbol, interval, hist)
+
+    def put_source(self, symbol, interval, hist):
+        entry = (time.time(), hist)
+        with self.lock:
+            self.sources[(symbol, interval)] = entry
+        return entry
+
+    def get_info(self, symbol):
+        with self.lock:
+            entry = self.info.get(symbol)
+        if entry is not None and time.time() - entry[0] < INFO_TTL:
+            return entry[1]
+        return self.flights.do(('info', symbol), self._fetch_info, symbol)
+
+    def _fetch_info(self, symbol):
+        info = self.provider.info(symbol)
+        with self.lock:
+            self.info[symbol] = (time.time(), info)
+        return info
+
+    def get_news(self, symbol):
+        with self.lock:
+            entry = self.news.get(symbol)
+        if entry is not None and time.time() - entry[0] < NEWS_TTL:
+            return entry[1]
+        return self.flights.do(('news', symbol), self._fetch_news, symbol)
+
+    def _fetch_news(self, symbol):
+        news = self.provider.news(symbol)
+        with self.lock:
+            self.news[symbol] = (time.time(), news)
+        return news
+
+    def submit(self, endpoint, symbol):
+        """Fetch 'info', 'news' or 'history' for a symbol in the background"""
+        if endpoint == 'info':
+            return self.flights.executor.submit(self.get_info, symbol)
+        if endpoint == 'news':
+            return self.flights.executor.submit(self.get_news, symbol)
+        if endpoint == 'history':
+            return self.flights.executor.submit(self.get_bars, symbol, '1d')
+        raise ValueError(f"Unknown endpoint: {endpoint}")
+
+    def get_bars(self, symbol, timeframe='1d'):
+        config = TIMEFRAMES[timeframe]
+        fetched_at, hist = self.get_source(symbol, config['source'])
+        if config['rule'] is None or hist.empty:
+            return hist
+
+        key = (symbol, timeframe)
+        with self.lock:
+            entry = self.derived.get(key)
+        if entry is not None and entry[0] == fetched_at:
+            return entry[1]
+        bars = resample_bars(hist, config['rule'])
+        with self.lock:
+            self.derived[key] = (fetched_at, bars)
+        return bars
+
+    def get_many(self, symbol, timeframes):
+        """Bars for several timeframes, loading each source interval once"""
+        return {timeframe: self.get_bars(symbol, timeframe) for timeframe in timeframes}
+
+    def get_cached_bars(self, symbols, timeframe='1d'):
+        """Bars for many symbols from the cache whatever their age, batch-downloading the rest"""
+        interval = TIMEFRAMES[timeframe]['source']
+        with self.lock:
+            cached = [symbol for symbol in symbols if (symbol, interval) in self.sources]
+        missing = [symbol for symbol in symbols if symbol not in cached]
+        results = self.download(missing, timeframe) if missing else {}
+        for symbol in cached:
+            with self.lock:
+                fetched_at, hist = self.sources[(symbol, interval)]
+            if TIMEFRAMES[timeframe]['rule'] is None:
+                results[symbol] = hist
+            else:
+                results[symbol] = resample_bars(hist, TIMEFRAMES[timeframe]['rule'])
+        return results
+
+    def download(self, symbols, timeframe='1d'):
+        """Batched download of many symbols into the cache; returns {symbol: bars}"""
+        config = TIMEFRAMES[timeframe]
+        interval = config['source']
+        results = {}
+        for symbol, hist in self.provider.download(symbols, config['period'], interval).items():
+            self.put_source(symbol, interval, hist)
+            results[symbol] = self.get_bars(symbol, timeframe)
+        return results
+
+    def refresh_tail(self, symbols, timeframe='1d', period='5d'):
+        """Update cached bars for many symbols with one small batched request.
+
+        Symbols already cached only need their last few bars, which are
+        spliced onto the cached history; anything not cached yet gets a full
+        download first. Returns {symbol: bars}.
+        """
+        interval = TIMEFRAMES[timeframe]['source']
+        with self.lock:
+            cached = {symbol: self.sources[(symbol, interval)][1] for symbol in symbols
+                      if (symbol, interval) in self.sources}
+        missing = [symbol for symbol in symbols if symbol not in cached]
+
+        results = self.download(missing, timeframe) if missing else {}
+        if not cached:
+            return results
+
+        for symbol, tail in self.provider.download(list(cached), period, interval).items():
+            hist = cached[symbol]
+            merged = pd.concat([hist[hist.index < tail.index[0]], tail[hist.columns.intersection(tail.columns)]])
+            self.put_source(symbol, interval, merged)
+            results[symbol] = self.get_bars(symbol, timeframe)
+        return results
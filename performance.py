@@ -0,0 +1,361 @@
+import os
+import threading
+
+import numpy as np
+
+TRADING_DAYS = 252
+
+
+def transaction_flow(kind, shares, price):
+    """Cash moved into the positions by one ledger transaction.
+
+    Buys add money, sells take it out, and a dividend is paid out of the
+    position as cash, so it counts as a withdrawal (and therefore as return).
+    """
+    if kind == 'buy':
+        return shares * price
+    if kind == 'sell':
+        return -shares * price
+    if kind == 'dividend':
+        return -price
+    return 0.0
+
+
+def flows_on(ledger, date):
+    """Net flow per symbol for the transactions dated on the given day"""
+    flows = {}
+    for symbol, holding in ledger.holdings.items():
+        for txn_date, kind, _, shares, price in reversed(holding.transactions):
+            if txn_date < date:
+                break
+            if txn_date == date:
+                flows[symbol] = flows.get(symbol, 0.0) + transaction_flow(kind, shares, price)
+    return flows
+
+
+def _days(dates):
+    return np.asarray(dates, dtype='datetime64[D]')
+
+
+def daily_returns(values, flows):
+    """Per-day portfolio returns with each day's flows at the start of the day.
+
+    values and flows are (days, positions) arrays; the result has one return
+    per day, with the first day measured against a zero starting value.
+    """
+    total = values.sum(axis=1)
+    flow = flows.sum(axis=1)
+    previous = np.concatenate(([0.0], total[:-1]))
+    base = previous + flow
+    gain = total - base
+    return np.divide(gain, base, out=np.zeros_like(gain), where=base > 1e-9)
+
+
+def rolling_sharpe(returns, window=63, risk_free=0.0):
+    """Annualized Sharpe ratio over a trailing window, NaN until the window fills"""
+    result = np.full(len(returns), np.nan)
+    if len(returns) < window:
+        return result
+    excess = returns - risk_free / TRADING_DAYS
+    sums = np.cumsum(np.concatenate(([0.0], excess)))
+    squares = np.cumsum(np.concatenate(([0.0], excess * excess)))
+    total = sums[window:] - sums[:-window]
+    total_sq = squares[window:] - squares[:-window]
+    mean = total / window
+    var = np.maximum(total_sq / window - mean * mean, 0.0) * window / (window - 1)
+    std = np.sqrt(var)
+    result[window - 1:] = np.divide(mean, std, out=np.full_like(mean, np.nan), where=std > 1e-12) * np.sqrt(TRADING_DAYS)
+    return result
+
+
+def max_drawdown(returns):
+    """Largest peak-to-trough fall of the growth index as (drawdown, peak index, trough index)"""
+    if not len(returns):
+        return 0.0, 0, 0
+    wealth = np.cumprod(1.0 + returns)
+    peaks = np.maximum.accumulate(wealth)
+    drawdowns = wealth / peaks - 1.0
+    trough = int(np.argmin(drawdowns))
+    peak = int(np.argmax(wealth[:trough + 1]))
+    return float(drawdowns[trough]), peak, trough
+
+
+def money_weighted_return(dates, flows, final_value):
+    """Annualized IRR of the investor's cash flows plus the closing value (XIRR)"""
+    days = _days(dates)
+    cash = -np.asarray(flows, dtype=float)
+    cash[-1] += final_value
+    if not np.any(cash > 0) or not np.any(cash < 0):
+        return None
+    years = (days - days[0]).astype(float) / 365.0
+
+    def npv(rate):
+        return np.sum(cash / (1.0 + rate) ** years)
+
+    # Bracket the root, then bisect: robust where Newton steps can overshoot
+    low, high = -0.9999, 1.0
+    while npv(high) > 0 and high < 1e6:
+        high *= 2
+    if npv(low) * npv(high) > 0:
+        return None
+    for _ in range(200):
+        mid = (low + high) / 2
+        if npv(mid) > 0:
+            low = mid
+        else:
+            high = mid
+        if high - low < 1e-10:
+            break
+    return (low + high) / 2
+
+
+def attribution(values, flows, returns):
+    """Dollar P&L and return contribution of each position.
+
+    Each day's return is split across positions by their share of the
+    day's gain, and the daily contributions are scaled so they sum to the
+    compounded time-weighted return.
+    """
+    previous = np.vstack((np.zeros((1, values.shape[1])), values[:-1]))
+    pnl = values - previous - flows
+    base = previous.sum(axis=1) + flows.sum(axis=1)
+    daily = np.divide(pnl, base[:, None], out=np.zeros_like(pnl), where=base[:, None] > 1e-9)
+    contribution = daily.sum(axis=0)
+    arithmetic = returns.sum()
+    twr = np.prod(1.0 + returns) - 1.0
+    if abs(arithmetic) > 1e-12:
+        contribution = contribution * (twr / arithmetic)
+    return pnl.sum(axis=0), contribution
+
+
+class PortfolioHistory:
+    """Daily portfolio snapshots stored column-wise: one row per day, one column per symbol.
+
+    Rows are appended (or today's row overwritten) as prices and
+    transactions come in, into buffers that grow geometrically so each
+    append is amortized O(positions). Every metric is a vectorized pass
+    over the arrays. Back-dated transactions make the stored history stale;
+    backfill() rebuilds it from the ledger and cached daily closes.
+    """
+
+    def __init__(self, path='performance.npz'):
+        self.path = path
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.symbols = []
+        self.columns = {}
+        self.size = 0
+        self.dates = np.empty(0, dtype='datetime64[D]')
+        self.values = np.zeros((0, 0))
+        self.flows = np.zeros((0, 0))
+        # Transactions dated up to and before the latest snapshot, to spot transactions added since
+        self.ledger_size = 0
+        self.ledger_before = 0
+
+    def __len__(self):
+        return self.size
+
+    def _column(self, symbol):
+        column = self.columns.get(symbol)
+        if column is None:
+            column = self.columns[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return column
+
+    def _reserve(self, rows, cols):
+        capacity, width = self.values.shape
+        if rows <= capacity and cols <= width:
+            return
+        capacity = max(rows, capacity * 2 if rows > capacity else capacity, 16)
+        width = max(cols, width * 2 if cols > width else width, 8)
+        for name in ('values', 'flows'):
+            grown = np.zeros((capacity, width))
+            old = getattr(self, name)
+            grown[:old.shape[0], :old.shape[1]] = old
+            setattr(self, name, grown)
+        dates = np.empty(capacity, dtype='datetime64[D]')
+        dates[:len(self.dates)] = self.dates
+        self.dates = dates
+
+    def record(self, date, values, flows, ledger=None):
+        """Append the snapshot for date, or replace it if date is the latest row"""
+        day = np.datetime64(date, 'D')
+        with self.lock:
+            row = self.size
+            if self.size:
+                last = self.dates[self.size - 1]
+                if day < last:
+                    raise ValueError(f"Snapshot for {date} is older than the last one ({last})")
+                if day == last:
+                    row = self.size - 1
+            for symbol in set(values) | set(flows):
+                self._column(symbol)
+            self._reserve(row + 1, len(self.symbols))
+            self.dates[row] = day
+            self.values[row] = 0.0
+            self.flows[row] = 0.0
+            for symbol, value in values.items():
+                self.values[row, self.columns[symbol]] = value
+            for symbol, flow in flows.items():
+                self.flows[row, self.columns[symbol]] = flow
+            self.size = row + 1
+            if ledger is not None:
+                self._cover(ledger)
+
+    def _cover(self, ledger):
+        day = str(self.dates[self.size - 1]) if self.size else ''
+        self.ledger_size = sum(1 for txn in ledger.transactions if txn[0] <= day)
+        self.ledger_before = sum(1 for txn in ledger.transactions if txn[0] < day)
+
+    def needs_backfill(self, ledger, date):
+        """True when the ledger holds transactions the snapshots before date never saw"""
+        if len(ledger) < self.ledger_size:
+            return True
+        if not self.size:
+            return len(ledger) > 0
+        # Counted by date, not position: a combined ledger keeps its transactions sorted by date
+        day = np.datetime64(date, 'D')
+        before = sum(1 for txn in ledger.transactions if txn[0] < str(day))
+        # A latest row for date itself is replaced on the next record, so only the rows before it count
+        return before > (self.ledger_before if self.dates[self.size - 1] == day else self.ledger_size)
+
+    def backfill(self, ledger, closes):
+        """Rebuild every snapshot from the ledger and {symbol: daily close Series}.
+
+        The calendar is the union of the closes' trading days from the first
+        transaction on. A position is worth nothing until its closes begin;
+        if it was already held by then, those shares enter as an opening flow
+        on its first priced day.
+        """
+        series = {}
+        for symbol, close in closes.items():
+            close = close.dropna()
+            if close.empty or symbol not in ledger.holdings:
+                continue
+            index = close.index
+            if getattr(index, 'tz', None) is not None:
+                index = index.tz_localize(None)
+            series[symbol] = (index.values.astype('datetime64[D]'), close.to_numpy(dtype=float))
+
+        first_txn = min((txn[0] for txn in ledger.transactions), default=None)
+        with self.lock:
+            self.reset()
+            self._cover(ledger)
+            if first_txn is None or not series:
+                return 0
+            start = max(np.datetime64(first_txn, 'D'), min(days[0] for days, _ in series.values()))
+            calendar = np.unique(np.concatenate([days for days, _ in series.values()]))
+            calendar = calendar[calendar >= start]
+            if not len(calendar):
+                return 0
+
+            rows = len(calendar)
+            self._reserve(rows, len(series))
+            self.dates[:rows] = calendar
+            for symbol, (days, prices) in series.items():
+                column = self._column(symbol)
+                holding = ledger.holdings[symbol]
+
+                at = np.searchsorted(days, calendar, side='right') - 1
+                if at[-1] < 0:
+                    continue
+                price = np.where(at >= 0, prices[np.maximum(at, 0)], 0.0)
+                index_dates = _days(holding.index_dates)
+                index_shares = np.asarray(holding.index_shares, dtype=float)
+                held = np.searchsorted(index_dates, calendar, side='right') - 1
+                shares = np.where(held >= 0, index_shares[np.maximum(held, 0)], 0.0)
+                self.values[:rows, column] = shares * price
+
+                # First row with a price for this symbol
+                first = int(np.argmax(at >= 0))
+                txns = holding.transactions
+                txn_days = _days([t[0] for t in txns])
+                amounts = np.array([transaction_flow(t[1], t[3], t[4]) for t in txns])
+                inside = txn_days >= calendar[first]
+                # Transactions on non-trading days land on the next trading day
+                slots = np.minimum(np.searchsorted(calendar, txn_days[inside], side='left'), rows - 1)
+                np.add.at(self.flows[:rows, column], slots, amounts[inside])
+
+                opening = np.searchsorted(index_dates, calendar[first], side='left') - 1
+                if opening >= 0:
+                    self.flows[first, column] += index_shares[opening] * price[first]
+            self.size = rows
+            self._cover(ledger)
+        return rows
+
+    def metrics(self, window=63, risk_free=0.0):
+        """Time- and money-weighted returns, Sharpe, drawdown and per-position attribution"""
+        with self.lock:
+            if not self.size:
+                return None
+            dates = self.dates[:self.size].copy()
+            values = self.values[:self.size, :len(self.symbols)].copy()
+            flows = self.flows[:self.size, :len(self.symbols)].copy()
+            symbols = list(self.symbols)
+
+        returns = daily_returns(values, flows)
+        twr = float(np.prod(1.0 + returns) - 1.0)
+        years = max((dates[-1] - dates[0]).astype(int), 1) / 365.0
+        sharpe = rolling_sharpe(returns, window, risk_free)
+        drawdown, peak, trough = max_drawdown(returns)
+        pnl, contribution = attribution(values, flows, returns)
+        order = np.argsort(-contribution)
+        return {
+            'start': str(dates[0]),
+            'end': str(dates[-1]),
+            'days': len(dates),
+            'value': float(values[-1].sum()),
+            'twr': twr,
+            'twr_annualized': (1.0 + twr) ** (1.0 / years) - 1.0 if years >= 1 and twr > -1 else None,
+            'mwr': money_weighted_return(dates, flows.sum(axis=1), values[-1].sum()),
+            'sharpe': None if np.isnan(sharpe[-1]) else float(sharpe[-1]),
+            'rolling_sharpe': sharpe,
+            'max_drawdown': drawdown,
+            'drawdown_peak': str(dates[peak]),
+            'drawdown_trough': str(dates[trough]),
+            'attribution': [(symbols[i], float(pnl[i]), float(contribution[i])) for i in order],
+        }
+
+    def save(self):
+        with self.lock:
+            arrays = {
+                'dates': self.dates[:self.size].astype('int64'),
+                'symbols': np.array(self.symbols, dtype=str),
+                'values': self.values[:self.size, :len(self.symbols)],
+                'flows': self.flows[:self.size, :len(self.symbols)],
+                'ledger_size': np.int64(self.ledger_size),
+                'ledger_before': np.int64(self.ledger_before),
+            }
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as data:
+                dates = data['dates'].astype('datetime64[D]')
+                symbols = [str(symbol) for symbol in data['symbols']]
+                values = data['values']
+                flows = data['flows']
+                ledger_size = int(data['ledger_size'])
+                # Histories saved before the count by date assume no transactions on the latest row's day
+                ledger_before = int(data['ledger_before']) if 'ledger_before' in data else ledger_size
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading performance history: {e}")
+            return
+        with self.lock:
+            self.reset()
+            for symbol in symbols:
+                self._column(symbol)
+            self._reserve(len(dates), len(symbols))
+            self.dates[:len(dates)] = dates
+            self.values[:len(dates), :len(symbols)] = values
+            self.flows[:len(dates), :len(symbols)] = flows
+            self.size = len(dates)
+            self.ledger_size = ledger_size
+            self.ledger_before = ledger_before
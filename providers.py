@@ -0,0 +1,283 @@
+import bisect
+import glob
+import gzip
+import json
+import os
+import threading
+import time
+import zlib
+from datetime import datetime
+
+import pandas as pd
+import yfinance as yf
+
+from market_data import MARKET_TZ
+
+ARCHIVE_PATH = 'market_archive.jsonl.gz'
+ARCHIVE_SUFFIX = '.jsonl.gz'
+
+
+def _archive_base(path):
+    return path[:-len(ARCHIVE_SUFFIX)] if path.endswith(ARCHIVE_SUFFIX) else path
+
+
+def session_path(path, started):
+    """A new file for one recording session, e.g. market_archive.20240501-093000.jsonl.gz"""
+    base = f"{_archive_base(path)}.{started:%Y%m%d-%H%M%S}"
+    candidate, n = base + ARCHIVE_SUFFIX, 2
+    while os.path.exists(candidate):
+        candidate, n = f"{base}-{n}{ARCHIVE_SUFFIX}", n + 1
+    return candidate
+
+
+def archive_files(path):
+    """Every file of an archive: path itself, if present, then each session file"""
+    files = [path] if os.path.exists(path) else []
+    pattern = glob.escape(_archive_base(path)) + '.*' + ARCHIVE_SUFFIX
+    return files + sorted(name for name in glob.glob(pattern) if name != path)
+
+
+def split_download(data, symbols):
+    """Yield (symbol, bars) from a grouped yf.download result"""
+    for symbol in symbols:
+        if isinstance(data.columns, pd.MultiIndex):
+            if symbol not in data.columns.get_level_values(0):
+                continue
+            hist = data[symbol]
+        else:
+            hist = data
+        hist = hist.dropna(subset=['Close'])
+        if not hist.empty:
+            yield symbol, hist
+
+
+def frame_to_record(df):
+    index = pd.DatetimeIndex(df.index)
+    # Epoch nanoseconds, whatever resolution the index is stored in
+    epoch = pd.Timestamp(0, tz='UTC') if index.tz is not None else pd.Timestamp(0)
+    nanos = (index - epoch) // pd.Timedelta(1, 'ns')
+    return {'index': nanos.tolist(), 'tz': str(index.tz) if index.tz is not None else None,
+            'name': index.name, 'columns': [str(column) for column in df.columns],
+            'values': df.to_numpy(dtype=float).tolist()}
+
+
+def frame_from_record(record):
+    index = pd.to_datetime(record['index'], unit='ns', utc=record['tz'] is not None)
+    if record['tz'] is not None:
+        index = index.tz_convert(record['tz'])
+    index.name = record['name']
+    return pd.DataFrame(record['values'], index=index, columns=record['columns'])
+
+
+class YahooProvider:
+    """Live market data from Yahoo Finance via yfinance"""
+
+    def history(self, symbol, period, interval):
+        return yf.Ticker(symbol).history(period=period, interval=interval)
+
+    def download(self, symbols, period, interval):
+        """Bars for many symbols from one batched request, as {symbol: DataFrame}"""
+        data = yf.download(sorted(symbols), period=period, interval=interval,
+                           group_by="ticker", threads=True, progress=False)
+        return dict(split_download(data, symbols))
+
+    def info(self, symbol):
+        return yf.Ticker(symbol).info
+
+    def news(self, symbol):
+        return yf.Ticker(symbol).news
+
+    def now(self):
+        return datetime.now(MARKET_TZ)
+
+
+class RecordingProvider:
+    """Passes calls through to another provider and archives every response.
+
+    Each response is one JSON line in a gzip archive, tagged with the time it
+    was received; batched downloads are stored per symbol, so playback can
+    serve them to single-symbol requests and vice versa. Every session
+    writes its own file next to path, so a session that dies without
+    closing its file cannot damage earlier recordings.
+    """
+
+    def __init__(self, provider, path=ARCHIVE_PATH):
+        self.provider = provider
+        self.path = session_path(path, datetime.now())
+        self.lock = threading.Lock()
+        self.file = gzip.open(self.path, 'wt', encoding='utf-8')
+
+    def _write(self, kind, key, data):
+        line = json.dumps({'t': time.time(), 'kind': kind, 'key': key, 'data': data}, default=str)
+        with self.lock:
+            if self.file.closed:
+                # A fetch finishing after the app closed the recording
+                return
+            self.file.write(line + '\n')
+            self.file.flush()
+
+    def history(self, symbol, period, interval):
+        hist = self.provider.history(symbol, period, interval)
+        self._write('history', [symbol, period, interval], frame_to_record(hist))
+        return hist
+
+    def download(self, symbols, period, interval):
+        results = self.provider.download(symbols, period, interval)
+        for symbol, hist in results.items():
+            self._write('history', [symbol, period, interval], frame_to_record(hist))
+        return results
+
+    def info(self, symbol):
+        info = self.provider.info(symbol)
+        self._write('info', [symbol], info)
+        return info
+
+    def news(self, symbol):
+        news = self.provider.news(symbol)
+        self._write('news', [symbol], news)
+        return news
+
+    def now(self):
+        return self.provider.now()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+class ReplayClock:
+    """Maps wall-clock time onto recorded time, optionally sped up.
+
+    With speed 0 the clock stays at stop, the end of the recording, so every
+    request gets the last response recorded for it.
+    """
+
+    def __init__(self, start, stop, speed=0.0):
+        self.start = start
+        self.stop = stop
+        self.speed = speed
+        self.started_at = time.time()
+
+    def time(self):
+        if not self.speed:
+            return self.stop
+        return self.start + (time.time() - self.started_at) * self.speed
+
+
+class PlaybackProvider:
+    """Serves responses from a recorded archive instead of the network.
+
+    A request gets the latest response recorded for it at or before the
+    replay clock, and intraday bars past the clock are hidden, so a recorded
+    trading day can be replayed at any speed. History requests with no exact
+    match fall back to another recording of the same symbol and interval;
+    unknown symbols get the same empty results Yahoo returns.
+    """
+
+    def __init__(self, path=ARCHIVE_PATH, speed=0.0, start=None):
+        self.path = path
+        # (kind, key) -> sorted recorded times and their responses
+        self.responses = {}
+        # (symbol, interval) -> history keys recorded for it
+        self.intervals = {}
+        self.load()
+
+        times = [t for recorded, _ in self.responses.values() for t in recorded]
+        first, last = (min(times), max(times)) if times else (time.time(), time.time())
+        if start is not None:
+            start = pd.Timestamp(start)
+            if start.tzinfo is None:
+                start = start.tz_localize(MARKET_TZ)
+            first = start.timestamp()
+        self.clock = ReplayClock(first, last, speed)
+
+    def load(self):
+        entries = []
+        for path in archive_files(self.path):
+            try:
+                with gzip.open(path, 'rt', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            entries.append(json.loads(line))
+                        except ValueError:
+                            continue
+            except (EOFError, OSError, zlib.error) as e:
+                # A recording cut off mid-write still replays up to that point
+                print(f"Archive {path} ends early ({e}); using what was read")
+        entries.sort(key=lambda entry: entry['t'])
+
+        for entry in entries:
+            key = (entry['kind'], tuple(entry['key']))
+            data = frame_from_record(entry['data']) if entry['kind'] == 'history' else entry['data']
+            recorded, values = self.responses.setdefault(key, ([], []))
+            recorded.append(entry['t'])
+            values.append(data)
+            if entry['kind'] == 'history':
+                symbol, period, interval = entry['key']
+                keys = self.intervals.setdefault((symbol, interval), [])
+                if key not in keys:
+                    keys.append(key)
+
+    def _lookup(self, key):
+        entry = self.responses.get(key)
+        if entry is None:
+            return None
+        recorded, values = entry
+        # Before a key's first recording, serve that first response
+        i = max(bisect.bisect_right(recorded, self.clock.time()) - 1, 0)
+        return values[i]
+
+    def _visible(self, hist):
+        """Hide bars after the replay clock"""
+        if hist.empty or not self.clock.speed:
+            return hist
+        cutoff = pd.Timestamp(self.clock.time(), unit='s', tz='UTC')
+        index = hist.index
+        if index.tz is None:
+            cutoff = cutoff.tz_convert(MARKET_TZ).tz_localize(None)
+        return hist[index <= cutoff]
+
+    def history(self, symbol, period, interval):
+        hist = self._lookup(('history', (symbol, period, interval)))
+        if hist is None:
+            keys = self.intervals.get((symbol, interval))
+            if not keys:
+                return pd.DataFrame()
+            hist = max((self._lookup(key) for key in keys), key=len)
+        return self._visible(hist)
+
+    def download(self, symbols, period, interval):
+        results = {}
+        for symbol in symbols:
+            hist = self.history(symbol, period, interval)
+            if not hist.empty:
+                results[symbol] = hist
+        return results
+
+    def info(self, symbol):
+        return self._lookup(('info', (symbol,))) or {}
+
+    def news(self, symbol):
+        return self._lookup(('news', (symbol,))) or []
+
+    def now(self):
+        return datetime.fromtimestamp(self.clock.time(), MARKET_TZ)
+
+
+def provider_from_env():
+    """Pick the data provider from PORTFOLIO_PROVIDER: yahoo (default), record or playback.
+
+    PORTFOLIO_ARCHIVE sets the archive path; playback also reads
+    PORTFOLIO_REPLAY_SPEED (0 = serve the end of the recording) and
+    PORTFOLIO_REPLAY_START (e.g. "2024-05-01 09:30", market time).
+    """
+    mode = os.environ.get('PORTFOLIO_PROVIDER', 'yahoo').lower()
+    path = os.environ.get('PORTFOLIO_ARCHIVE', ARCHIVE_PATH)
+    if mode == 'record':
+        return RecordingProvider(YahooProvider(), path)
+    if mode == 'playback':
+        return PlaybackProvider(path, float(os.environ.get('PORTFOLIO_REPLAY_SPEED', '0')),
+                                os.environ.get('PORTFOLIO_REPLAY_START'))
+    if mode != 'yahoo':
+        raise ValueError(f"Unknown PORTFOLIO_PROVIDER: {mode}")
+    return YahooProvider()
@@ -0,0 +1,84 @@
+# Lookup tables behind the AI signals. Analyses store only codes; the text,
+# colours and scores shown in the GUI are looked up here when displayed.
+
+# (key, name, description, score), in the order the rules are evaluated.
+# Descriptions may use {month_change} and {volatility} from the analysis.
+SIGNALS = [
+    ('oversold', "🟢 OVERSOLD", "RSI below 30 indicates oversold conditions - potential buying opportunity", 2),
+    ('overbought', "🔴 OVERBOUGHT", "RSI above 70 indicates overbought conditions - consider taking profits", -2),
+    ('neutral_rsi', "🟡 NEUTRAL RSI", "RSI in neutral zone - no strong momentum signal", 0),
+    ('macd_bullish', "🟢 MACD BULLISH", "MACD above signal line with positive momentum", 2),
+    ('macd_bearish', "🔴 MACD BEARISH", "MACD below signal line with negative momentum", -2),
+    ('below_bb', "🟢 BELOW BB LOWER", "Price touching lower Bollinger Band - potential reversal up", 1),
+    ('above_bb', "🔴 ABOVE BB UPPER", "Price touching upper Bollinger Band - potential reversal down", -1),
+    ('strong_uptrend', "🟢 STRONG UPTREND", "All moving averages aligned bullishly - strong upward trend", 2),
+    ('strong_downtrend', "🔴 STRONG DOWNTREND", "All moving averages aligned bearishly - strong downward trend", -2),
+    ('short_uptrend', "🟢 SHORT-TERM UPTREND", "7-day MA above 20-day MA - short-term bullish", 1),
+    ('strong_momentum', "🟢 STRONG MOMENTUM", "Up {month_change:.1f}% this month - strong buying pressure", 1),
+    ('weak_momentum', "🔴 WEAK MOMENTUM", "Down {month_change:.1f}% this month - strong selling pressure", -1),
+    ('volume_spike', "📈 HIGH VOLUME SPIKE", "Volume 2x above average - significant institutional interest", 1),
+    ('low_volume', "📉 LOW VOLUME", "Below average volume - lack of conviction", 0),
+    ('high_volatility', "⚠️ HIGH VOLATILITY", "Volatility at {volatility:.1f}% - expect large price swings", 0),
+]
+
+SIGNAL_CODES = {key: code for code, (key, _, _, _) in enumerate(SIGNALS)}
+SIGNAL_NAMES = {name: code for code, (_, name, _, _) in enumerate(SIGNALS)}
+
+# (minimum score, recommendation, action, colour), best first; the last row catches the rest
+RECOMMENDATIONS = [
+    (4, "🚀 STRONG BUY", "Excellent entry point with multiple bullish signals", "#00e676"),
+    (2, "✅ BUY", "Good opportunity with positive indicators", "#66bb6a"),
+    (-1, "⏸️ HOLD", "Wait for clearer signals before making moves", "#ffa726"),
+    (-3, "⚠️ CONSIDER SELLING", "Warning signs present - protect your capital", "#ff7043"),
+    (None, "🚨 STRONG SELL", "Multiple bearish signals - exit recommended", "#ef5350"),
+]
+
+# (level, colour, description) by risk code
+RISK_LEVELS = [
+    ("LOW", "#66bb6a", "Relatively stable - suitable for conservative investors"),
+    ("MEDIUM", "#ffa726", "Moderate risk - balanced approach recommended"),
+    ("HIGH", "#ef5350", "High volatility - suitable for risk-tolerant traders"),
+]
+
+RISK_CODES = {level: code for code, (level, _, _) in enumerate(RISK_LEVELS)}
+
+
+def signal_mask(codes):
+    """Pack signal codes into one integer; table order keeps them in rule order"""
+    mask = 0
+    for code in codes:
+        mask |= 1 << code
+    return mask
+
+
+def mask_codes(mask):
+    return [code for code in range(len(SIGNALS)) if mask >> code & 1]
+
+
+def recommendation_code(score):
+    for code, (minimum, _, _, _) in enumerate(RECOMMENDATIONS):
+        if minimum is None or score >= minimum:
+            return code
+
+
+def describe_signals(codes, month_change=0.0, volatility=0.0):
+    """The signals dict shown in the GUI, built from signal codes"""
+    signals = []
+    score = 0
+    for code in codes:
+        _, name, description, points = SIGNALS[code]
+        signals.append((name, description.format(month_change=month_change, volatility=volatility), points))
+        score += points
+    _, recommendation, action, color = RECOMMENDATIONS[recommendation_code(score)]
+    return {
+        'recommendation': recommendation,
+        'action': action,
+        'color': color,
+        'signals': signals,
+        'score': score
+    }
+
+
+def describe_risk(code):
+    level, color, desc = RISK_LEVELS[code]
+    return {"level": level, "color": color, "desc": desc}
@@ -0,0 +1,150 @@
+import math
+import os
+import struct
+
+from market_data import TIMEFRAMES
+from signals import (SIGNAL_NAMES, RISK_CODES, signal_mask, mask_codes,
+                     describe_signals, describe_risk)
+
+MAGIC = b'PTAS'
+VERSION = 2
+HEADER = struct.Struct('<4sHII')
+
+# Record layout for VERSION 2: prices as doubles, so high-priced tickers keep
+# their cents, the other indicators as floats, then the signal bitmask, risk
+# code and timeframe code. None is stored as NaN.
+PRICE_FIELD = 'current_price'
+PRICE_FIELDS = (PRICE_FIELD, 'bb_upper', 'bb_middle', 'bb_lower', 'ma_7', 'ma_20', 'ma_50',
+                'high_52w', 'low_52w')
+FLOAT_FIELDS = ('rsi', 'macd', 'macd_signal', 'macd_hist', 'week_change', 'month_change',
+                'volume_ratio', 'volatility')
+RECORD = struct.Struct('<' + 'd' * len(PRICE_FIELDS) + 'f' * len(FLOAT_FIELDS) + 'HBB')
+
+# VERSION 1 stored only current_price as a double; its records are repacked on load
+V1_FLOAT_FIELDS = ('rsi', 'macd', 'macd_signal', 'macd_hist', 'bb_upper', 'bb_middle', 'bb_lower',
+                   'ma_7', 'ma_20', 'ma_50', 'week_change', 'month_change', 'volume_ratio',
+                   'volatility', 'high_52w', 'low_52w')
+V1_RECORD = struct.Struct('<d' + 'f' * len(V1_FLOAT_FIELDS) + 'HBB')
+
+TIMEFRAME_CODES = list(TIMEFRAMES)
+
+# In the order of the analysis dicts
+FIELDS = (PRICE_FIELD,) + V1_FLOAT_FIELDS + ('signals', 'risk_level', 'timeframe')
+
+# field -> (struct, byte offset) for reading one value without unpacking the record
+_OFFSETS = {field: (struct.Struct('<d'), 8 * i) for i, field in enumerate(PRICE_FIELDS)}
+_OFFSETS.update({field: (struct.Struct('<f'), 8 * len(PRICE_FIELDS) + 4 * i)
+                 for i, field in enumerate(FLOAT_FIELDS)})
+_TAIL = struct.Struct('<HBB')
+_TAIL_OFFSET = 8 * len(PRICE_FIELDS) + 4 * len(FLOAT_FIELDS)
+
+
+def _number(value):
+    return float('nan') if value is None else float(value)
+
+
+class CompactAnalysis:
+    """An analysis packed into one fixed-size record.
+
+    Reads like the analysis dict it came from (analysis['rsi'],
+    analysis.get('signals', {})) but holds only numbers and codes; the
+    signal and risk text is rebuilt from the lookup tables in signals.py
+    when it is asked for.
+    """
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+    @classmethod
+    def from_analysis(cls, analysis):
+        if isinstance(analysis, cls):
+            return analysis
+        signals = analysis.get('signals') or {}
+        codes = [SIGNAL_NAMES[name] for name, _, _ in signals.get('signals', []) if name in SIGNAL_NAMES]
+        risk = (analysis.get('risk_level') or {}).get('level', 'LOW')
+        timeframe = analysis.get('timeframe', '1d')
+        return cls(RECORD.pack(
+            _number(analysis[PRICE_FIELD]),
+            *(_number(analysis.get(field)) for field in PRICE_FIELDS[1:]),
+            *(_number(analysis.get(field)) for field in FLOAT_FIELDS),
+            signal_mask(codes),
+            RISK_CODES.get(risk, 0),
+            TIMEFRAME_CODES.index(timeframe) if timeframe in TIMEFRAME_CODES else TIMEFRAME_CODES.index('1d')))
+
+    def _value(self, field):
+        unpack, offset = _OFFSETS[field]
+        value = unpack.unpack_from(self.data, offset)[0]
+        return None if math.isnan(value) else value
+
+    def __getitem__(self, key):
+        if key in _OFFSETS:
+            return self._value(key)
+        if key == 'signals':
+            mask = _TAIL.unpack_from(self.data, _TAIL_OFFSET)[0]
+            return describe_signals(mask_codes(mask), self._value('month_change') or 0.0,
+                                    self._value('volatility') or 0.0)
+        if key == 'risk_level':
+            return describe_risk(_TAIL.unpack_from(self.data, _TAIL_OFFSET)[1])
+        if key == 'timeframe':
+            return TIMEFRAME_CODES[_TAIL.unpack_from(self.data, _TAIL_OFFSET)[2]]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        # Indicators a short history could not fill in were stored as NaN and read back as None
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+    def __contains__(self, key):
+        return key in FIELDS
+
+    def keys(self):
+        return FIELDS
+
+    def to_dict(self):
+        return {field: self[field] for field in FIELDS}
+
+
+def save_snapshot(path, analyses):
+    """Write {symbol: analysis} as a versioned binary snapshot"""
+    symbols = list(analyses)
+    names = '\n'.join(symbols).encode('utf-8')
+    records = b''.join(CompactAnalysis.from_analysis(analyses[symbol]).data for symbol in symbols)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(symbols), len(names)))
+        f.write(names)
+        f.write(records)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path):
+    """Read a snapshot back into {symbol: CompactAnalysis}"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is truncated")
+    magic, version, count, names_size = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not an analysis snapshot")
+    if version not in (1, VERSION):
+        raise ValueError(f"Unsupported analysis snapshot version {version}")
+    record = V1_RECORD if version == 1 else RECORD
+    start = HEADER.size + names_size
+    if len(data) != start + count * record.size:
+        raise ValueError(f"{path} is truncated")
+    symbols = data[HEADER.size:start].decode('utf-8').split('\n') if count else []
+    size = record.size
+    if version == 1:
+        return {symbol: CompactAnalysis(_repack_v1(data, start + i * size)) for i, symbol in enumerate(symbols)}
+    return {symbol: CompactAnalysis(data[start + i * size:start + (i + 1) * size])
+            for i, symbol in enumerate(symbols)}
+
+
+def _repack_v1(data, offset):
+    values = V1_RECORD.unpack_from(data, offset)
+    numbers = dict(zip((PRICE_FIELD,) + V1_FLOAT_FIELDS, values))
+    return RECORD.pack(*(numbers[field] for field in PRICE_FIELDS + FLOAT_FIELDS), *values[-3:])
@@ -0,0 +1,47 @@
+from importers import chronological, read_transactions
+from ledger import TransactionLedger
+
+
+def import_rows(path, chunk_size):
+    rows = []
+    for chunk in read_transactions(str(path), chunk_size=chunk_size):
+        rows.extend(chunk)
+    ledger = TransactionLedger()
+    ledger.extend(chronological(rows))
+    return ledger
+
+
+def test_newest_first_export_spanning_chunks(tmp_path):
+    # Oldest first: a buy every day, a same-day buy and sell, then sales of earlier lots
+    events = [(f"2024-01-{day:02d}", "Buy", "AAPL", 10, 100 + day) for day in range(1, 21)]
+    events += [("2024-01-21", "Buy", "AAPL", 5, 130), ("2024-01-21", "Sell", "AAPL", 5, 131)]
+    events += [(f"2024-02-{day:02d}", "Sell", "AAPL", 10, 150) for day in range(1, 11)]
+
+    path = tmp_path / "export.csv"
+    lines = ["Date,Action,Symbol,Quantity,Price"]
+    lines += [",".join(str(field) for field in event) for event in reversed(events)]
+    path.write_text("\n".join(lines) + "\n")
+
+    ledger = import_rows(path, chunk_size=4)
+
+    holding = ledger.position("AAPL")
+    assert len(ledger) == len(events)
+    assert holding.shares == 100
+    # FIFO: the 105 shares sold came from the oldest lots, leaving half of day 11 onwards
+    remaining = 5 * 111 + sum(10 * (100 + day) for day in range(12, 21)) + 5 * 130
+    bought = sum(10 * (100 + day) for day in range(1, 21)) + 5 * 130
+    assert ledger.cost_basis("AAPL") == remaining
+    assert ledger.realized_pnl("AAPL") == 5 * 131 + 100 * 150 - (bought - remaining)
+
+
+def test_oldest_first_export_keeps_its_order(tmp_path):
+    path = tmp_path / "export.csv"
+    path.write_text("Date,Action,Symbol,Quantity,Price\n"
+                    "2024-01-02,Buy,MSFT,10,300\n"
+                    "2024-01-02,Sell,MSFT,4,310\n"
+                    "2024-01-03,Sell,MSFT,6,320\n")
+
+    ledger = import_rows(path, chunk_size=1)
+
+    assert ledger.position("MSFT").shares == 0
+    assert ledger.realized_pnl("MSFT") == 4 * 10 + 6 * 20
@@ -0,0 +1,39 @@
+import pytest
+
+pytest.importorskip('pandas')
+
+from snapshot import CompactAnalysis, load_snapshot, save_snapshot
+
+
+def short_history_analysis():
+    # Two daily bars: the price and moving averages are known, RSI and volatility are not
+    nan = float('nan')
+    return {
+        'current_price': 12.5, 'rsi': nan, 'macd': 0.0, 'macd_signal': 0.0, 'macd_hist': 0.0,
+        'bb_upper': 12.5, 'bb_middle': 12.5, 'bb_lower': 12.5, 'ma_7': 12.5, 'ma_20': 12.5, 'ma_50': 12.5,
+        'week_change': 0, 'month_change': 0, 'volume_ratio': 1.0, 'volatility': nan,
+        'high_52w': 12.5, 'low_52w': 12.0,
+        'signals': {'signals': [], 'score': 0, 'recommendation': '⏸️ HOLD'},
+        'risk_level': {'level': 'LOW'}, 'timeframe': '1d',
+    }
+
+
+def test_short_history_symbol_reads_back_defaults(tmp_path):
+    path = str(tmp_path / 'analysis_snapshot.bin')
+    save_snapshot(path, {'NEWCO': short_history_analysis()})
+
+    analysis = load_snapshot(path)['NEWCO']
+
+    assert analysis['rsi'] is None
+    assert analysis.get('rsi') is None
+    assert analysis.get('rsi', 0) == 0
+    assert analysis.get('volatility', 0) == 0
+    assert f"{analysis.get('rsi', 0):.1f} {analysis.get('volatility', 0):.2f}" == "0.0 0.00"
+    assert analysis.get('current_price', 0) == 12.5
+    assert analysis.get('signals')['recommendation']
+
+
+def test_get_falls_back_for_unknown_keys():
+    analysis = CompactAnalysis.from_analysis(short_history_analysis())
+
+    assert analysis.get('sector', 'N/A') == 'N/A'